@@ -0,0 +1,33 @@
+import os
+from collections import defaultdict
+
+import pytest
+
+module_durations = defaultdict(float)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
+    """`-n auto` на одном ядре запускает тесты без процессов xdist."""
+    count = os.cpu_count() or 1
+    return count if count > 1 else 0
+
+
+def pytest_runtest_logreport(report):
+    module_durations[report.nodeid.split('::')[0]] += report.duration
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not module_durations:
+        return
+    terminalreporter.write_sep('=', 'время по модулям')
+    for module, total in sorted(
+            module_durations.items(), key=lambda row: row[1], reverse=True):
+        terminalreporter.write_line(f'{total:8.2f}s  {module}')
+
+
+def pytest_sessionfinish(session):
+    from django.conf import settings
+    if settings.configured:
+        from core.testrunner import remove_test_media
+        remove_test_media()
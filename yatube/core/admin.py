@@ -0,0 +1,51 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import ProfiledFunction, SlowQuery, Task
+
+
+class ProfiledFunctionAdmin(admin.ModelAdmin):
+    list_display = (
+        'view_name',
+        'function',
+        'own_samples',
+        'total_samples',
+    )
+    list_filter = ('view_name',)
+    search_fields = ('function',)
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        'created',
+        'view_name',
+        'duration',
+        'frame',
+        'sql',
+    )
+    list_filter = ('view_name',)
+    search_fields = ('sql', 'frame')
+    readonly_fields = ('plan',)
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'created',
+        'started',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('error',)
+    actions = ('requeue',)
+
+    def requeue(self, request, queryset):
+        queryset.update(status=Task.QUEUED, attempts=0, run_at=timezone.now())
+    requeue.short_description = 'Поставить в очередь заново'
+
+
+admin.site.register(ProfiledFunction, ProfiledFunctionAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
+admin.site.register(Task, TaskAdmin)
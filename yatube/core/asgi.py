@@ -0,0 +1,146 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+
+BODY_MEMORY_SIZE: int = 1024 * 1024
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса из ASGI scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class WsgiToAsgi:
+    """ASGI-приложение поверх WSGI-приложения Django.
+
+    Django 2.2 не умеет ASGI: event loop принимает соединения и читает
+    тело запроса, а сами view выполняются в пуле потоков.
+    """
+
+    def __init__(self, wsgi_application, workers=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or settings.ASGI_THREADS
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported scope type {scope["type"]}')
+        body = await self.read_body(receive)
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, result = await loop.run_in_executor(
+                self.executor, self.start_wsgi, build_environ(scope, body)
+            )
+            try:
+                await send({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': headers,
+                })
+                await self.send_body(result, send)
+            finally:
+                if hasattr(result, 'close'):
+                    await loop.run_in_executor(self.executor, result.close)
+        finally:
+            body.close()
+
+    async def read_chunks(self, result):
+        """Части тела ответа, без сборки всего тела в памяти.
+
+        Содержимое обычного HttpResponse уже в памяти и отдаётся сразу.
+        Потоковые ответы (файлы, сжатие на лету) читаются в пуле по одной
+        части: поток занят только на время чтения части, а не пока
+        клиент принимает весь ответ.
+        """
+        if not getattr(result, 'streaming', True):
+            for chunk in result:
+                yield chunk
+            return
+        loop = asyncio.get_running_loop()
+        chunks = iter(result)
+        while True:
+            chunk = await loop.run_in_executor(
+                self.executor, next, chunks, None
+            )
+            if chunk is None:
+                return
+            yield chunk
+
+    async def send_body(self, result, send):
+        async for chunk in self.read_chunks(result):
+            if chunk:
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = SpooledTemporaryFile(max_size=BODY_MEMORY_SIZE)
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body.seek(0)
+        return body
+
+    def start_wsgi(self, environ):
+        """Вызывает WSGI-приложение: статус, заголовки и итератор тела."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        return response['status'], response['headers'], result
@@ -0,0 +1,58 @@
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+
+def brotli_string(content):
+    return brotli.compress(content)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor()
+    for item in sequence:
+        chunk = compressor.process(item)
+        if chunk:
+            yield chunk
+    yield compressor.finish()
+
+
+ENCODERS = {
+    'gzip': (compress_string, compress_sequence),
+}
+if brotli is not None:
+    ENCODERS['br'] = (brotli_string, brotli_sequence)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых `q=0`."""
+    encodings = set()
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name.lower())
+    return encodings
+
+
+def choose_encoding(header, allowed):
+    """Первая из разрешённых кодировок, которую примет клиент."""
+    accepted = accepted_encodings(header)
+    for encoding in allowed:
+        if encoding in ENCODERS and encoding in accepted:
+            return encoding
+    return None
@@ -0,0 +1,93 @@
+import logging
+from functools import wraps
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.module_loading import import_string
+
+from .tasks import task
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+PURGE_TIMEOUT: int = 2
+
+logger = logging.getLogger(__name__)
+
+
+def cache_policy(max_age=0, shared_max_age=None, private=False):
+    """Заголовки кеширования ответа view.
+
+    Анонимам ответ отдаётся как `public` с `max-age` для браузера и
+    `s-maxage` для CDN; авторизованным и при `private=True` — как
+    `private`. Кешируются только ответы 200.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if private or request.user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=max_age,
+                    s_maxage=shared_max_age or max_age,
+                )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def add_surrogate_keys(request, *keys):
+    """Помечает ответ на запрос ключами для точечной очистки CDN."""
+    if not hasattr(request, 'surrogate_keys'):
+        request.surrogate_keys = set()
+    request.surrogate_keys.update(keys)
+
+
+class LogPurger:
+    """Пишет ключи очистки в лог вместо обращения к CDN."""
+
+    def __init__(self, **options):
+        pass
+
+    def purge(self, keys):
+        logger.info('PURGE %s', ' '.join(keys))
+
+
+class HttpPurger:
+    """Отправляет `PURGE` с заголовком `Surrogate-Key` (Varnish xkey)."""
+
+    def __init__(self, url, timeout=PURGE_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def purge(self, keys):
+        request = Request(
+            self.url,
+            method='PURGE',
+            headers={SURROGATE_KEY_HEADER: ' '.join(keys)},
+        )
+        urlopen(request, timeout=self.timeout).close()
+
+
+def get_purger():
+    config = settings.EDGE_CACHE_PURGER
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+@task
+def purge_keys(keys):
+    """Очистка в фоне: ошибка CDN приводит к повтору задачи."""
+    get_purger().purge(keys)
+
+
+def purge(*keys):
+    """Ставит в очередь очистку кеша CDN по ключам."""
+    keys = sorted(set(keys))
+    if keys:
+        purge_keys.delay(keys)
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class Subscription:
+    """Подписка одного соединения на набор каналов.
+
+    Вместо очереди сообщений хранит счётчик событий и наибольшее
+    значение, поэтому память на соединение не растёт, сколько бы
+    событий ни пришло, пока клиент их не забрал.
+    """
+
+    __slots__ = ('loop', 'channels', 'event', 'count', 'latest')
+
+    def __init__(self, loop, channels):
+        self.loop = loop
+        self.channels = tuple(channels)
+        self.event = asyncio.Event()
+        self.count = 0
+        self.latest = 0
+
+    def notify(self, value):
+        self.count += 1
+        self.latest = max(self.latest, value)
+        self.event.set()
+
+    def take(self):
+        """Счётчик и наибольшее значение с последнего вызова."""
+        count, self.count = self.count, 0
+        self.event.clear()
+        return count, self.latest
+
+
+class Broker:
+    """Подписки процесса по каналам.
+
+    `dispatch` можно вызывать из любого потока: уведомление
+    передаётся в event loop подписки.
+    """
+
+    def __init__(self):
+        self.channels = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(asyncio.get_running_loop(), channels)
+        with self.lock:
+            for channel in subscription.channels:
+                self.channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.channels[channel]
+
+    def dispatch(self, channel, value):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.notify, value
+                )
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    """События только внутри процесса."""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, value):
+        self.broker.dispatch(channel, value)
+
+
+if redis is not None:
+    class RedisBackend:
+        """События между процессами через Redis PUBLISH/PSUBSCRIBE.
+
+        Поток-слушатель передаёт сообщения других процессов в
+        локальный брокер.
+        """
+
+        def __init__(self, broker, url='redis://localhost:6379/0',
+                     prefix='yatube:events:'):
+            self.broker = broker
+            self.prefix = prefix
+            self.redis = redis.Redis.from_url(url)
+            self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            self.pubsub.psubscribe(**{f'{prefix}*': self.receive})
+            self.pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+        def receive(self, message):
+            channel = message['channel'].decode()[len(self.prefix):]
+            self.broker.dispatch(channel, int(message['data']))
+
+        def publish(self, channel, value):
+            self.redis.publish(self.prefix + channel, value)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    config = settings.EVENTS_BACKEND
+    return import_string(config['BACKEND'])(
+        broker, **config.get('OPTIONS', {})
+    )
+
+
+def publish(channel, value):
+    """Сообщает подписчикам канала о событии со значением `value`."""
+    get_backend().publish(channel, value)
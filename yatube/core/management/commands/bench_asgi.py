@@ -0,0 +1,120 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi, build_environ
+
+
+def scope_for(path):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'http_version': '1.1',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+def percentile(latencies, share):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает WSGI и ASGI на медленных клиентах при одинаковом '
+            'числе потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--client-delay', type=float, default=0.1,
+            help='Сколько секунд клиент передаёт запрос и столько же '
+                 'принимает ответ (0 — мерить только цену адаптера).'
+        )
+
+    def handle(self, *args, **options):
+        """Оба режима в одном процессе с `workers` потоками для view.
+
+        Медленный клиент моделируется задержкой до и после view. Как
+        у синхронного WSGI-сервера, в режиме WSGI эти задержки
+        проходят внутри потока-воркера и занимают его. В режиме ASGI
+        их ждёт event loop, а поток занят только самой view. Замер
+        идёт в одном процессе, настоящие серверы (gunicorn, uvicorn)
+        он не заменяет.
+        """
+        wsgi_application = get_wsgi_application()
+        scope = scope_for(options['path'])
+        self.report('WSGI', self.bench_wsgi(
+            wsgi_application, scope, options
+        ))
+        self.report('ASGI', asyncio.run(
+            self.bench_asgi(wsgi_application, scope, options)
+        ))
+
+    def bench_wsgi(self, wsgi_application, scope, options):
+        """Поток-воркер занят от приёма запроса до отправки ответа."""
+        workers = threading.BoundedSemaphore(options['workers'])
+        delay = options['client_delay']
+
+        def request(_):
+            start = time.monotonic()
+            with workers:
+                time.sleep(delay)
+                environ = build_environ(scope, io.BytesIO())
+                result = wsgi_application(environ, lambda *args: None)
+                b''.join(result)
+                result.close()
+                time.sleep(delay)
+            return time.monotonic() - start
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options['concurrency']) as clients:
+            latencies = list(clients.map(request, range(options['requests'])))
+        return latencies, time.monotonic() - started
+
+    async def bench_asgi(self, wsgi_application, scope, options):
+        """Медленный приём и отправку ждёт event loop, а не поток."""
+        application = WsgiToAsgi(wsgi_application, options['workers'])
+        connections = asyncio.Semaphore(options['concurrency'])
+        delay = options['client_delay']
+
+        async def receive():
+            await asyncio.sleep(delay)
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if (message['type'] == 'http.response.body'
+                    and not message.get('more_body')):
+                await asyncio.sleep(delay)
+
+        async def request():
+            async with connections:
+                start = time.monotonic()
+                await application(scope, receive, send)
+                return time.monotonic() - start
+
+        started = time.monotonic()
+        latencies = await asyncio.gather(
+            *(request() for _ in range(options['requests']))
+        )
+        application.executor.shutdown()
+        return latencies, time.monotonic() - started
+
+    def report(self, name, result):
+        latencies, elapsed = result
+        self.stdout.write(
+            f'{name}: {len(latencies) / elapsed:.1f} req/s, '
+            f'p50 {percentile(latencies, 0.5) * 1000:.1f} ms, '
+            f'p95 {percentile(latencies, 0.95) * 1000:.1f} ms'
+        )
@@ -0,0 +1,37 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии. Для сессий в БД удаляет пачками, '
+        'чтобы не держать долгую блокировку таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.SESSION_CLEANUP_BATCH
+        )
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        if not issubclass(engine.SessionStore, DBStore):
+            engine.SessionStore.clear_expired()
+            return
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(Session.objects.filter(
+                expire_date__lt=now
+            ).values_list('session_key', flat=True)[:options['batch']])
+            if not keys:
+                break
+            deleted += Session.objects.filter(
+                session_key__in=keys
+            ).delete()[0]
+        self.stdout.write(f'Удалено сессий: {deleted}')
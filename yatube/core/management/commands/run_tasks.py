@@ -0,0 +1,71 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core.tasks import TASK_BATCH, purge_done, queue_stats, work
+
+PURGE_INTERVAL: int = 60 * 10
+
+
+def run_worker(batch, poll, once):
+    """Цикл воркера: пачка задач, при пустой очереди — пауза.
+
+    Раз в `PURGE_INTERVAL` секунд воркер удаляет старые выполненные
+    задачи, чтобы таблица очереди не росла.
+    """
+    done = 0
+    purged_at = None
+    while True:
+        close_old_connections()
+        if purged_at is None or time.monotonic() - purged_at > PURGE_INTERVAL:
+            purge_done()
+            purged_at = time.monotonic()
+        count = work(batch)
+        done += count
+        if count:
+            continue
+        if once:
+            return done
+        time.sleep(poll)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.TASK_WORKER_PROCESSES
+        )
+        parser.add_argument('--batch', type=int, default=TASK_BATCH)
+        parser.add_argument('--poll', type=float, default=1.0)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда очередь опустеет.'
+        )
+
+    def handle(self, *args, **options):
+        worker_args = (options['batch'], options['poll'], options['once'])
+        if options['processes'] < 2:
+            done = run_worker(*worker_args)
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=worker_args)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+        stats = queue_stats()
+        self.stdout.write(
+            f'В очереди: {stats["queued"]}, ошибок: {stats["failed"]}'
+        )
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+SESSION_TABLE = 'django_session'
+
+
+def session_queries(client, path, requests):
+    """Запросы к таблице сессий на каждый из `requests` GET `path`."""
+    counts = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            client.get(path)
+        counts.append(sum(
+            SESSION_TABLE in query['sql']
+            for query in context.captured_queries
+        ))
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Считает обращения к таблице сессий на запрос пользователя.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--requests', type=int, default=10)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        client = Client()
+        client.force_login(user)
+        counts = session_queries(client, options['path'], options['requests'])
+        self.stdout.write(
+            f'Запросов к сессиям: {sum(counts)} на {len(counts)} '
+            f'запросов, по запросам: {counts}'
+        )
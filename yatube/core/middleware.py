@@ -0,0 +1,167 @@
+import logging
+import random
+import threading
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .compression import ENCODERS, choose_encoding
+from .edgecache import SURROGATE_KEY_HEADER
+from .profiling import StackSampler, record
+from .querylog import SlowQueryLogger
+
+logger = logging.getLogger(__name__)
+
+
+class RequestSizeLimitMiddleware:
+    """Отвечает 413 на запросы больше `UPLOAD_MAX_REQUEST_SIZE`.
+
+    Размер берётся из Content-Length до того, как кто-либо прочитает
+    `request.POST`, поэтому тело такого запроса не разбирается вовсе.
+    Стоит первым в `MIDDLEWARE`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > settings.UPLOAD_MAX_REQUEST_SIZE:
+            return HttpResponse(
+                'Слишком большой запрос',
+                status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+            )
+        return self.get_response(request)
+
+
+class SamplingProfilerMiddleware:
+    """Профилирует случайную долю запросов семплированием стека.
+
+    При `PROFILER_SAMPLE_RATE = 0` middleware отключается целиком.
+    Ошибка записи профиля попадает в лог, а ответ отдаётся как есть.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rate = settings.PROFILER_SAMPLE_RATE
+        if not self.rate:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+        sampler = StackSampler(
+            threading.get_ident(),
+            settings.PROFILER_INTERVAL
+        )
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+        match = request.resolver_match
+        try:
+            record(match.view_name if match else 'unresolved', stacks)
+        except Exception:
+            logger.exception('Не удалось сохранить профиль запроса')
+        return response
+
+
+class SlowQueryMiddleware:
+    """Логирует запросы к БД дольше `SLOW_QUERY_THRESHOLD` секунд.
+
+    Медленные запросы сохраняются с view, местом вызова и планом.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = settings.SLOW_QUERY_THRESHOLD
+        if self.threshold is None:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        query_logger = SlowQueryLogger(self.threshold)
+        with connection.execute_wrapper(query_logger):
+            response = self.get_response(request)
+        if query_logger.queries:
+            match = request.resolver_match
+            query_logger.store(match.view_name if match else 'unresolved')
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli, в том числе потоковые.
+
+    Типы содержимого и допустимые для них кодировки задаются в
+    `COMPRESS_CONTENT_TYPES`, ответы короче `COMPRESS_MIN_SIZE`
+    не сжимаются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        allowed = settings.COMPRESS_CONTENT_TYPES.get(content_type)
+        if not allowed:
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESS_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), allowed
+        )
+        if encoding is None:
+            return response
+        compress_string, compress_sequence = ENCODERS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class EdgeCacheMiddleware:
+    """Выставляет `Surrogate-Key` и не даёт CDN кешировать cookie.
+
+    Ключи собираются в `request.surrogate_keys` через
+    `core.edgecache.add_surrogate_keys`. Ответ, устанавливающий
+    cookie, переводится в `private`, даже если view разрешила кеш.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        keys = getattr(request, 'surrogate_keys', None)
+        if keys:
+            response[SURROGATE_KEY_HEADER] = ' '.join(sorted(keys))
+        if response.cookies and 'public' in response.get(
+                'Cache-Control', ''):
+            patch_cache_control(
+                response, private=True, max_age=0, s_maxage=0
+            )
+        return response
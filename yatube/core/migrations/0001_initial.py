@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfiledFunction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(db_index=True, max_length=200, verbose_name='View')),
+                ('function', models.CharField(max_length=255, verbose_name='Функция')),
+                ('own_samples', models.PositiveIntegerField(default=0, verbose_name='Собственные замеры')),
+                ('total_samples', models.PositiveIntegerField(default=0, verbose_name='Замеры с вложенными вызовами')),
+            ],
+            options={
+                'verbose_name': 'Горячая функция',
+                'verbose_name_plural': 'Горячие функции',
+                'ordering': ('-own_samples',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='profiledfunction',
+            constraint=models.UniqueConstraint(fields=('view_name', 'function'), name='unique_profiled_function'),
+        ),
+    ]
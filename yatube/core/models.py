@@ -0,0 +1,86 @@
+from django.db import models
+
+
+class ProfiledFunction(models.Model):
+    view_name = models.CharField('View', max_length=200, db_index=True)
+    function = models.CharField('Функция', max_length=255)
+    own_samples = models.PositiveIntegerField(
+        'Собственные замеры',
+        default=0
+    )
+    total_samples = models.PositiveIntegerField(
+        'Замеры с вложенными вызовами',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.view_name} {self.function}'
+
+    class Meta:
+        ordering = ('-own_samples', )
+        verbose_name = 'Горячая функция'
+        verbose_name_plural = 'Горячие функции'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('view_name', 'function'),
+                name='unique_profiled_function'
+            ),
+        )
+
+
+class SlowQuery(models.Model):
+    view_name = models.CharField('View', max_length=200, db_index=True)
+    sql = models.TextField('SQL')
+    params = models.TextField('Параметры', blank=True)
+    duration = models.FloatField('Длительность, с')
+    frame = models.CharField('Место вызова', max_length=255, blank=True)
+    plan = models.TextField('План запроса', blank=True)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.view_name} {self.sql[:50]}'
+
+    class Meta:
+        ordering = ('-created', )
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+
+
+class Task(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200, db_index=True)
+    payload = models.TextField('Аргументы', default='{}')
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    run_at = models.DateTimeField('Запустить после')
+    created = models.DateTimeField('Поставлена', auto_now_add=True)
+    started = models.DateTimeField('Начата', blank=True, null=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+    error = models.TextField('Ошибка', blank=True)
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
+
+    class Meta:
+        ordering = ('run_at', )
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(fields=('status', 'run_at'), name='task_queue'),
+        )
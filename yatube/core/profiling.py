@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+PROFILER_TOP: int = 50
+
+
+def frame_label(frame):
+    """Подпись кадра в формате `модуль:функция`."""
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{frame.f_code.co_name}'
+
+
+def collapse(frame):
+    """Стек кадра от корня к листу, склеенный через `;`."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    """Периодически снимает стек указанного потока.
+
+    Результат — счётчик свёрнутых стеков (формат flamegraph.pl).
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+            del frame
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+def aggregate(stacks):
+    """Собственные и общие попадания функций в выборку."""
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        labels = stack.split(';')
+        own[labels[-1]] += count
+        for label in set(labels):
+            total[label] += count
+    return own, total
+
+
+def write_collapsed(view_name, stacks):
+    """Дописывает стеки в `PROFILER_DIR/<view_name>.folded`."""
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    filename = view_name.replace(':', '.') + '.folded'
+    path = os.path.join(settings.PROFILER_DIR, filename)
+    with open(path, 'a') as folded:
+        for stack, count in stacks.items():
+            folded.write(f'{stack} {count}\n')
+
+
+def record(view_name, stacks):
+    """Сохраняет выборку запроса на диск и в агрегаты по view.
+
+    Строки функций создаются с `ignore_conflicts`, а счётчики
+    увеличиваются через F(), поэтому параллельные запросы к одной view
+    не сталкиваются на уникальной паре (view, функция).
+    """
+    from .models import ProfiledFunction
+
+    if not stacks:
+        return
+    write_collapsed(view_name, stacks)
+    own, total = aggregate(stacks)
+    hot = total.most_common(PROFILER_TOP)
+    with transaction.atomic():
+        ProfiledFunction.objects.bulk_create(
+            [ProfiledFunction(view_name=view_name, function=function)
+             for function, _ in hot],
+            ignore_conflicts=True,
+        )
+        for function, samples in hot:
+            ProfiledFunction.objects.filter(
+                view_name=view_name, function=function
+            ).update(
+                own_samples=F('own_samples') + own[function],
+                total_samples=F('total_samples') + samples,
+            )
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connection
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.QUERY_BATCH_WORKERS,
+            thread_name_prefix='query-batch'
+        )
+    return _executor
+
+
+def ensure_usable():
+    """Соединение потока пула переживает запросы, пока оно исправно.
+
+    `close_old_connections` при `CONN_MAX_AGE = 0` закрывало бы его
+    после каждого запроса, и каждый запрос платил бы за новое
+    соединение больше, чем выигрывает от параллельности.
+    """
+    if connection.connection is None:
+        return
+    if connection.get_autocommit() != connection.settings_dict['AUTOCOMMIT']:
+        connection.close()
+    elif connection.errors_occurred:
+        if connection.is_usable():
+            connection.errors_occurred = False
+        else:
+            connection.close()
+
+
+def run_query(query, wrappers=()):
+    """Выполняет запрос в потоке пула с execute wrappers вызывающего."""
+    ensure_usable()
+    with ExitStack() as stack:
+        for wrapper in wrappers:
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        return query()
+
+
+def batch(*queries):
+    """Выполняет независимые запросы параллельно.
+
+    Каждый запрос — функция без аргументов; результаты возвращаются
+    в порядке запросов. Execute wrappers текущего потока (например,
+    журнал медленных запросов) действуют и в потоках пула. Внутри
+    транзакции параллельные соединения не видят её данных, поэтому
+    там запросы идут последовательно.
+    """
+    if (settings.QUERY_BATCH_WORKERS < 2 or len(queries) < 2
+            or connection.in_atomic_block):
+        return [query() for query in queries]
+    wrappers = list(connection.execute_wrappers)
+    futures = [executor().submit(run_query, query, wrappers)
+               for query in queries]
+    return [future.result() for future in futures]
@@ -0,0 +1,79 @@
+import logging
+import os
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+SKIPPED_FILES = (
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'middleware.py'),
+)
+
+
+def caller_frame():
+    """Ближайший к запросу кадр из кода проекта."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(settings.BASE_DIR)
+                and filename not in SKIPPED_FILES):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            return f'{path}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def explain(sql, params):
+    """План выполнения SELECT-запроса или пустая строка."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return ''
+    return '\n'.join(' '.join(str(col) for col in row) for row in rows)
+
+
+class SlowQueryLogger:
+    """Execute wrapper, запоминающий запросы дольше порога."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.monotonic() - start
+            if duration >= self.threshold and not many:
+                self.queries.append((sql, params, duration, caller_frame()))
+
+    def store(self, view_name):
+        """Сохраняет накопленные запросы вместе с их планами."""
+        from .models import SlowQuery
+
+        for sql, params, duration, frame in self.queries:
+            logger.warning(
+                'Slow query %.1f ms in %s (%s): %s',
+                duration * 1000, view_name, frame, sql
+            )
+            SlowQuery.objects.create(
+                view_name=view_name,
+                sql=sql,
+                params=repr(params),
+                duration=duration,
+                frame=frame,
+                plan=explain(sql, params),
+            )
@@ -0,0 +1,112 @@
+import math
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+RATE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+ALL_METHODS = None
+
+
+def parse_rate(rate):
+    """`'10/m'`, `'100/h'`, `'5/10s'` -> (лимит, окно в секундах)."""
+    match = RATE.match(rate)
+    if match is None:
+        raise ValueError(f'Неверный формат лимита: {rate!r}')
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * UNITS[unit]
+
+
+def client_ip(request):
+    """IP клиента с учётом доверенных прокси.
+
+    Каждый прокси дописывает адрес справа в `RATELIMIT_IP_META`
+    (обычно X-Forwarded-For), а всё левее клиент может подделать.
+    Поэтому берётся адрес, записанный первым из
+    `RATELIMIT_TRUSTED_PROXIES` доверенных прокси, — столько позиций
+    от правого края.
+    """
+    header = settings.RATELIMIT_IP_META
+    if header and header in request.META:
+        addresses = [address.strip()
+                     for address in request.META[header].split(',')]
+        hops = max(settings.RATELIMIT_TRUSTED_PROXIES, 1)
+        return addresses[max(len(addresses) - hops, 0)]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def user_or_ip(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def ip(request):
+    return f'ip:{client_ip(request)}'
+
+
+def hit(key, limit, window, now=None):
+    """Учитывает запрос в скользящем окне.
+
+    Окно приближается двумя фиксированными: счётчик предыдущего
+    берётся с весом оставшейся в окне доли. Возвращает None, если
+    лимит не превышен, иначе число секунд до следующей попытки.
+
+    Счётчики живут в кеше `default`: без общего кеша (`SHARED_CACHE`)
+    каждый процесс считает сам, и при N воркерах лимит фактически
+    в N раз выше.
+    """
+    now = time.time() if now is None else now
+    current = int(now // window)
+    elapsed = now - current * window
+    current_key = f'ratelimit:{key}:{current}'
+    previous_key = f'ratelimit:{key}:{current - 1}'
+    cache.add(current_key, 0, window * 2)
+    try:
+        count = cache.incr(current_key)
+    except ValueError:
+        cache.set(current_key, 1, window * 2)
+        count = 1
+    previous = cache.get(previous_key, 0)
+    weighted = previous * (window - elapsed) / window + count
+    if weighted <= limit:
+        return None
+    if count > limit:
+        return math.ceil(window - elapsed)
+    return max(1, math.ceil(
+        window - elapsed - (limit - count) * window / max(previous, 1)
+    ))
+
+
+def ratelimit(rate, key=user_or_ip, methods=('POST',), group=None):
+    """Ограничивает частоту запросов к view.
+
+    `key(request)` выбирает, кого считать: по умолчанию пользователя,
+    а анонимов — по IP. Ограничиваются только методы из `methods`
+    (`ALL_METHODS` — все). При превышении отдаётся 429 с
+    `Retry-After`. Лимит общий для всех процессов, только если задан
+    общий кеш (`CACHE_BACKEND`), иначе он действует на каждый процесс.
+    """
+    limit, window = parse_rate(rate)
+
+    def decorator(view):
+        name = group or f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLE and (
+                    methods is ALL_METHODS or request.method in methods):
+                retry_after = hit(f'{name}:{key(request)}', limit, window)
+                if retry_after is not None:
+                    response = render(
+                        request, 'core/429.html', status=429
+                    )
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
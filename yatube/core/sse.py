@@ -0,0 +1,129 @@
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+
+from .events import broker
+from .queries import run_query
+
+SSE_HEARTBEAT: int = 15
+SSE_MAX_CONNECTIONS: int = 10000
+SSE_RETRY: int = 5000
+
+
+def session_user_id(scope):
+    """id пользователя из сессионной cookie запроса или None."""
+    cookies = SimpleCookie()
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    user_id = engine.SessionStore(morsel.value).get(SESSION_KEY)
+    return int(user_id) if user_id is not None else None
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def respond(send, status, body=b''):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class EventStream:
+    """ASGI-приложение server-sent events для лент.
+
+    `/<prefix>/<лента>/` подписывает соединение на каналы, которые
+    возвращает `channels(лента, user_id)` (None — такой ленты нет).
+    Клиент получает событие `posts` с числом новых записей и id
+    последней, а раз в `heartbeat` секунд — комментарий-пинг.
+    """
+
+    def __init__(self, channels, prefix='/events/', heartbeat=SSE_HEARTBEAT,
+                 max_connections=SSE_MAX_CONNECTIONS):
+        self.channels = channels
+        self.prefix = prefix
+        self.heartbeat = heartbeat
+        self.max_connections = max_connections
+        self.connections = 0
+
+    async def __call__(self, scope, receive, send):
+        feed = scope['path'][len(self.prefix):].strip('/')
+        loop = asyncio.get_running_loop()
+        channels = await loop.run_in_executor(
+            None, run_query,
+            lambda: self.channels(feed, session_user_id(scope))
+        )
+        if channels is None:
+            return await respond(send, 404)
+        if self.connections >= self.max_connections:
+            return await respond(send, 503)
+        self.connections += 1
+        subscription = broker.subscribe(channels)
+        try:
+            await self.stream(subscription, receive, send)
+        finally:
+            broker.unsubscribe(subscription)
+            self.connections -= 1
+
+    async def stream(self, subscription, receive, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {SSE_RETRY}\n\n'.encode(),
+            'more_body': True,
+        })
+        disconnected = asyncio.ensure_future(wait_disconnect(receive))
+        try:
+            while True:
+                waiter = asyncio.ensure_future(subscription.event.wait())
+                await asyncio.wait(
+                    (waiter, disconnected),
+                    timeout=self.heartbeat,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                waiter.cancel()
+                if disconnected.done():
+                    return
+                if subscription.event.is_set():
+                    count, latest = subscription.take()
+                    data = json.dumps({'count': count, 'latest': latest})
+                    message = f'event: posts\ndata: {data}\n\n'
+                else:
+                    message = ': ping\n\n'
+                await send({
+                    'type': 'http.response.body',
+                    'body': message.encode(),
+                    'more_body': True,
+                })
+        finally:
+            disconnected.cancel()
+
+
+def route(prefix, app, default):
+    """HTTP-запросы с путём на `prefix` — в `app`, остальное — в `default`."""
+    async def router(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'].startswith(prefix):
+            return await app(scope, receive, send)
+        return await default(scope, receive, send)
+    return router
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+from .compression import ENCODERS, SUFFIXES
+
+try:
+    from storages.backends.s3boto3 import S3Boto3Storage
+except ImportError:
+    S3Boto3Storage = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.map')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и сжатыми копиями `.gz` и `.br`.
+
+    Файлы, которых нет в манифесте (collectstatic не запускался),
+    отдаются под исходным именем.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_files = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, processed in processed_files:
+            if (not dry_run and isinstance(hashed_name, str)
+                    and hashed_name.endswith(COMPRESSIBLE)):
+                self.compress(name)
+                self.compress(hashed_name)
+            yield name, hashed_name, processed
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        for encoding, (compress_string, _) in ENCODERS.items():
+            compressed = compress_string(content)
+            if len(compressed) < len(content):
+                path = self.path(name) + SUFFIXES[encoding]
+                with open(path, 'wb') as compressed_file:
+                    compressed_file.write(compressed)
+            elif os.path.exists(self.path(name) + SUFFIXES[encoding]):
+                os.remove(self.path(name) + SUFFIXES[encoding])
+
+
+class ContentAddressedMixin:
+    """Хранит файлы под sha256 их содержимого.
+
+    Повторная загрузка того же файла не пишет ничего нового и получает
+    то же имя, а значит и те же миниатюры sorl-thumbnail. Файлы
+    раскладываются по подкаталогам `ab/cd/`, чтобы каталоги не
+    разрастались. Миниатюры sorl-thumbnail (`THUMBNAIL_PREFIX`) уже
+    названы по хешу исходника и опций и сохраняются как есть: иначе
+    sorl не найдёт их по предсказанному имени.
+
+    Повторно загруженному файлу обновляется время изменения: сборщик
+    мусора и отложенное удаление считают свежий файл занятым, даже
+    если раньше на него никто не ссылался.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name),
+            hexdigest[:2],
+            hexdigest[2:4],
+            hexdigest + extension,
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        prefix = getattr(settings, 'THUMBNAIL_PREFIX', 'cache/')
+        if name.startswith(prefix):
+            return super().save(name, content, max_length=max_length)
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            self.touch(name)
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def touch(self, name):
+        """Обновляет время изменения файла, если у хранилища есть пути."""
+        try:
+            path = self.path(name)
+        except NotImplementedError:
+            return
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+
+class ContentAddressedStorage(ContentAddressedMixin, FileSystemStorage):
+    pass
+
+
+if S3Boto3Storage is not None:
+    class ContentAddressedS3Storage(ContentAddressedMixin, S3Boto3Storage):
+        """S3 или совместимое хранилище (MinIO) с адресацией по хешу.
+
+        Адрес задаётся `AWS_S3_ENDPOINT_URL`, бакет —
+        `AWS_STORAGE_BUCKET_NAME`.
+        """
+
+        file_overwrite = False
@@ -0,0 +1,171 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import (
+    Avg, Count, DurationField, ExpressionWrapper, F, Min, Q
+)
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+TASK_MAX_ATTEMPTS: int = 3
+TASK_RETRY_DELAY: int = 10
+TASK_LEASE: int = 60 * 10
+TASK_BATCH: int = 20
+STATS_WINDOW: int = 60 * 60
+TASK_RETENTION: int = 60 * 60 * 24
+TASK_PURGE_BATCH: int = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def task(func=None, *, max_attempts=TASK_MAX_ATTEMPTS):
+    """Делает функцию фоновой задачей с методом `delay`.
+
+    Аргументы задачи должны сериализоваться в JSON. Воркер находит
+    функцию по имени `модуль.функция`.
+    """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.delay = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+        return func
+
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Воркер увидит задачу только после фиксации транзакции. При
+    `TASK_ALWAYS_EAGER` задача выполняется сразу после фиксации.
+    """
+    if settings.TASK_ALWAYS_EAGER:
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return None
+    return Task.objects.create(
+        name=func.task_name,
+        payload=json.dumps(
+            {'args': args, 'kwargs': kwargs}, cls=DjangoJSONEncoder
+        ),
+        max_attempts=func.max_attempts,
+        run_at=timezone.now(),
+    )
+
+
+def take(task_id, status, started, now):
+    """Переводит задачу в «выполняется», если её не изменили с чтения.
+
+    Сверяется и `started`: иначе два воркера, прочитавшие одну и ту же
+    задачу с истёкшей арендой, оба взяли бы её.
+    """
+    return bool(Task.objects.filter(
+        id=task_id, status=status, started=started
+    ).update(
+        status=Task.RUNNING,
+        started=now,
+        attempts=F('attempts') + 1,
+    ))
+
+
+def claim(limit=TASK_BATCH):
+    """Забирает готовые задачи, которые не взял другой воркер.
+
+    Задачи, зависшие в статусе «выполняется» дольше `TASK_LEASE`
+    (упавший воркер), забираются повторно.
+    """
+    now = timezone.now()
+    ready = Task.objects.filter(
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(status=Task.RUNNING, started__lt=now - timedelta(
+            seconds=TASK_LEASE
+        ))
+    ).values_list('id', 'status', 'started')[:limit]
+    claimed = [
+        task_id for task_id, status, started in list(ready)
+        if take(task_id, status, started, now)
+    ]
+    return list(Task.objects.filter(id__in=claimed))
+
+
+def execute(job):
+    """Выполняет задачу и записывает результат или повтор."""
+    try:
+        payload = json.loads(job.payload)
+        import_string(job.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        job.error = traceback.format_exc()
+        logger.exception('Задача %s упала', job.name)
+        if job.attempts < job.max_attempts:
+            job.status = Task.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=TASK_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = Task.FAILED
+            job.finished = timezone.now()
+    else:
+        job.status = Task.DONE
+        job.finished = timezone.now()
+    job.save(update_fields=('status', 'run_at', 'finished', 'error'))
+    return job.status
+
+
+def work(limit=TASK_BATCH):
+    """Выполняет одну пачку задач; возвращает число выполненных."""
+    jobs = claim(limit)
+    for job in jobs:
+        execute(job)
+    return len(jobs)
+
+
+def purge_done(retention=TASK_RETENTION, limit=TASK_PURGE_BATCH):
+    """Удаляет выполненные задачи старше `retention` секунд.
+
+    Удаляет пачками по `limit`, чтобы не держать долгую блокировку
+    таблицы; возвращает число удалённых. Задачи с ошибкой остаются
+    для разбора. Окно не меньше `STATS_WINDOW`, иначе `queue_stats`
+    недосчитается задержек.
+    """
+    border = timezone.now() - timedelta(
+        seconds=max(retention, STATS_WINDOW)
+    )
+    deleted = 0
+    while True:
+        ids = list(Task.objects.filter(
+            status=Task.DONE, finished__lt=border
+        ).values_list('id', flat=True)[:limit])
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(id__in=ids).delete()[0]
+
+
+def queue_stats():
+    """Глубина очереди и задержки для мониторинга."""
+    now = timezone.now()
+    counts = dict.fromkeys(dict(Task.STATUSES), 0)
+    for status, count in Task.objects.values_list('status').annotate(
+            count=Count('id')).order_by():
+        counts[status] = count
+    oldest = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).aggregate(oldest=Min('run_at'))['oldest']
+    latency = Task.objects.filter(
+        status=Task.DONE,
+        finished__gte=now - timedelta(seconds=STATS_WINDOW)
+    ).aggregate(latency=Avg(ExpressionWrapper(
+        F('started') - F('created'), output_field=DurationField()
+    )))['latency']
+    return {
+        **counts,
+        'oldest_wait': (now - oldest).total_seconds() if oldest else 0,
+        'avg_latency': latency.total_seconds() if latency else 0,
+    }
@@ -1,5 +1,60 @@
+import asyncio
+import gzip
+import http.server
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
 from http import HTTPStatus
-from django.test import TestCase
+from unittest import mock
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.core.management import call_command
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from django.utils import timezone
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings
+)
+
+from core.asgi import WsgiToAsgi, build_environ
+from core.compression import choose_encoding
+from core.management.commands.session_queries import session_queries
+from core.events import publish
+from core.edgecache import HttpPurger, add_surrogate_keys, cache_policy
+from core.middleware import (
+    CompressionMiddleware, EdgeCacheMiddleware, SamplingProfilerMiddleware,
+    SlowQueryMiddleware
+)
+from core.models import ProfiledFunction, SlowQuery, Task
+from core.profiling import StackSampler, aggregate, record
+from core.queries import batch, executor
+from core.ratelimit import hit, parse_rate
+from core.tasks import (
+    TASK_LEASE, claim, purge_done, queue_stats, take, task, work
+)
+from core.querylog import explain
+from core.sse import EventStream
+from core.storage import ContentAddressedMixin, ContentAddressedStorage
+from core.testrunner import remove_test_media
+from core.views import serve_static
+from posts.models import Post
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -7,3 +62,620 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class StackSamplerTest(TestCase):
+    def test_sampler_collects_collapsed_stacks(self):
+        sampler = StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        time.sleep(0.05)
+        stacks = sampler.stop()
+        self.assertTrue(stacks)
+        self.assertTrue(
+            any('core.test:test_sampler_collects' in s for s in stacks)
+        )
+
+    def test_aggregate_counts_own_and_total(self):
+        own, total = aggregate({'a:f;b:g': 3, 'a:f': 1})
+        self.assertEqual(own, {'b:g': 3, 'a:f': 1})
+        self.assertEqual(total, {'a:f': 4, 'b:g': 3})
+
+    def test_record_writes_folded_file_and_hot_functions(self):
+        with tempfile.TemporaryDirectory() as profiles:
+            with override_settings(PROFILER_DIR=profiles):
+                record('posts:index', {'a:f;b:g': 3})
+                record('posts:index', {'a:f;b:g': 2})
+            with open(os.path.join(profiles, 'posts.index.folded')) as f:
+                self.assertEqual(f.read(), 'a:f;b:g 3\na:f;b:g 2\n')
+        hot = ProfiledFunction.objects.get(
+            view_name='posts:index', function='b:g'
+        )
+        self.assertEqual((hot.own_samples, hot.total_samples), (5, 5))
+
+    def test_record_adds_to_rows_created_concurrently(self):
+        ProfiledFunction.objects.create(
+            view_name='posts:index', function='a:f', own_samples=1,
+            total_samples=1
+        )
+        with tempfile.TemporaryDirectory() as profiles:
+            with override_settings(PROFILER_DIR=profiles):
+                record('posts:index', {'a:f': 2})
+        hot = ProfiledFunction.objects.get(view_name='posts:index')
+        self.assertEqual((hot.own_samples, hot.total_samples), (3, 3))
+
+    @override_settings(PROFILER_SAMPLE_RATE=1)
+    def test_failed_record_keeps_the_response(self):
+        middleware = SamplingProfilerMiddleware(
+            lambda request: HttpResponse('ok')
+        )
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with mock.patch('core.middleware.record', side_effect=OSError):
+            with self.assertLogs('core.middleware', 'ERROR'):
+                response = middleware(request)
+        self.assertEqual(response.content, b'ok')
+
+    @override_settings(PROFILER_SAMPLE_RATE=0)
+    def test_middleware_disabled_without_sampling(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SamplingProfilerMiddleware(lambda request: None)
+
+
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='slow')
+        Post.objects.create(author=user, text='Медленный пост')
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_queries_over_threshold_are_stored_with_plan(self):
+        Client().get('/')
+        query = SlowQuery.objects.filter(
+            view_name='posts:index', sql__contains='posts_post'
+        ).first()
+        self.assertIsNotNone(query)
+        self.assertTrue(query.plan)
+        self.assertTrue(query.frame)
+
+    def test_fast_queries_are_not_stored(self):
+        Client().get('/')
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_explain_skips_writes(self):
+        self.assertEqual(explain('DELETE FROM posts_post', ()), '')
+
+    @override_settings(SLOW_QUERY_THRESHOLD=None)
+    def test_middleware_disabled_without_threshold(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SlowQueryMiddleware(lambda request: None)
+
+
+class WsgiToAsgiTest(TestCase):
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/about/author/',
+        'query_string': b'page=2',
+        'http_version': '1.1',
+        'headers': [(b'host', b'testserver'), (b'accept', b'text/html'),
+                    (b'accept', b'*/*'), (b'content-type', b'text/plain')],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 5000),
+    }
+
+    def test_environ_built_from_scope(self):
+        environ = build_environ(self.scope, io.BytesIO())
+        self.assertEqual(environ['PATH_INFO'], '/about/author/')
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['REMOTE_ADDR'], '127.0.0.1')
+
+    def test_request_is_served_through_wsgi_application(self):
+        application = WsgiToAsgi(get_wsgi_application(), workers=1)
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(application(self.scope, receive, send))
+        self.assertEqual(messages[0]['status'], HTTPStatus.OK)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        self.assertIn('Об авторе'.encode(), body)
+        self.assertFalse(messages[-1].get('more_body', False))
+
+    def test_streaming_response_is_sent_chunk_by_chunk(self):
+        produced = []
+
+        def body():
+            for number in range(3):
+                produced.append(number)
+                yield str(number).encode()
+
+        def wsgi_application(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return body()
+
+        application = WsgiToAsgi(wsgi_application, workers=1)
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append((len(produced), message.get('body')))
+
+        asyncio.run(application(self.scope, receive, send))
+        self.assertEqual(
+            sent, [(0, None), (1, b'0'), (2, b'1'), (3, b'2'), (3, b'')]
+        )
+
+
+class EventStreamTest(SimpleTestCase):
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/events/index/',
+        'query_string': b'',
+        'http_version': '1.1',
+        'headers': [],
+    }
+
+    def run_stream(self, scope, on_message):
+        stream = EventStream(
+            lambda feed, user_id: ['feed'] if feed == 'index' else None,
+            heartbeat=0.05,
+        )
+        messages = []
+
+        async def scenario():
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                if on_message(message.get('body', b'')):
+                    disconnect.set()
+
+            await stream(scope, receive, send)
+
+        asyncio.run(scenario())
+        self.assertEqual(stream.connections, 0)
+        return messages
+
+    def test_events_are_counted_until_delivered(self):
+        def on_message(body):
+            if body.startswith(b'retry'):
+                for post_id in (3, 7):
+                    publish('feed', post_id)
+            return body.startswith(b'event')
+
+        messages = self.run_stream(self.scope, on_message)
+        self.assertEqual(messages[0]['status'], HTTPStatus.OK)
+        self.assertIn(
+            (b'content-type', b'text/event-stream'), messages[0]['headers']
+        )
+        self.assertEqual(
+            messages[-1]['body'],
+            b'event: posts\ndata: {"count": 2, "latest": 7}\n\n'
+        )
+
+    def test_idle_connection_gets_heartbeats(self):
+        messages = self.run_stream(
+            self.scope, lambda body: body.startswith(b':')
+        )
+        self.assertEqual(messages[-1]['body'], b': ping\n\n')
+
+    def test_unknown_feed_is_not_found(self):
+        messages = self.run_stream(
+            {**self.scope, 'path': '/events/nope/'}, lambda body: True
+        )
+        self.assertEqual(messages[0]['status'], HTTPStatus.NOT_FOUND)
+
+
+class QueryBatchTest(TransactionTestCase):
+    @override_settings(QUERY_BATCH_WORKERS=2)
+    def test_queries_run_in_worker_threads(self):
+        User.objects.create_user(username='batch')
+        users, thread = batch(
+            lambda: list(User.objects.values_list('username', flat=True)),
+            threading.get_ident,
+        )
+        self.assertEqual(users, ['batch'])
+        self.assertNotEqual(thread, threading.get_ident())
+
+    @override_settings(QUERY_BATCH_WORKERS=2)
+    def test_worker_threads_keep_connection_and_caller_wrappers(self):
+        seen = []
+
+        def wrapper(execute, sql, params, many, context):
+            seen.append(threading.get_ident())
+            return execute(sql, params, many, context)
+
+        opened = []
+
+        def count_connection(**kwargs):
+            opened.append(kwargs['connection'])
+
+        connection_created.connect(count_connection)
+        self.addCleanup(connection_created.disconnect, count_connection)
+        with connection.execute_wrapper(wrapper):
+            for _ in range(5):
+                batch(User.objects.exists, User.objects.exists)
+        self.assertEqual(len(seen), 10)
+        self.assertNotIn(threading.get_ident(), seen)
+        self.assertLessEqual(len(opened), executor()._max_workers)
+
+    @override_settings(QUERY_BATCH_WORKERS=2)
+    def test_queries_inside_transaction_run_sequentially(self):
+        with transaction.atomic():
+            User.objects.create_user(username='uncommitted')
+            users, thread = batch(
+                lambda: User.objects.filter(username='uncommitted').count(),
+                threading.get_ident,
+            )
+        self.assertEqual(users, 1)
+        self.assertEqual(thread, threading.get_ident())
+
+
+@override_settings(
+    COMPRESS_MIN_SIZE=100,
+    COMPRESS_CONTENT_TYPES={'text/html': ('br', 'gzip')}
+)
+class CompressionTest(SimpleTestCase):
+    html = b'<p>' + b'yatube ' * 100 + b'</p>'
+
+    def compress(self, response, accept='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_choose_encoding_respects_order_and_quality(self):
+        self.assertEqual(choose_encoding('gzip, br;q=0', ('br', 'gzip')),
+                         'gzip')
+        self.assertIsNone(choose_encoding('identity', ('gzip', )))
+
+    def test_html_above_threshold_is_gzipped(self):
+        response = self.compress(HttpResponse(self.html))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.html)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_brotli_is_preferred_when_accepted(self):
+        response = self.compress(HttpResponse(self.html), accept='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.html)
+
+    def test_small_or_unlisted_responses_are_left_alone(self):
+        small = self.compress(HttpResponse(b'<p>hi</p>'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        css = self.compress(HttpResponse(self.html, content_type='text/css'))
+        self.assertFalse(css.has_header('Content-Encoding'))
+
+    def test_streaming_html_is_compressed_on_the_fly(self):
+        response = self.compress(StreamingHttpResponse(iter([self.html] * 3)))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            self.html * 3
+        )
+
+
+class StaticPipelineTest(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.TemporaryDirectory()
+        self.root = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.source.name, 'css'))
+        with open(os.path.join(self.source.name, 'css', 'site.css'), 'w') as f:
+            f.write('body { color: black; }\n' * 100)
+        self.settings = override_settings(
+            STATICFILES_DIRS=[self.source.name],
+            STATIC_ROOT=self.root.name,
+        )
+        self.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def tearDown(self):
+        self.settings.disable()
+        self.source.cleanup()
+        self.root.cleanup()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        hashed = staticfiles_storage.stored_name('css/site.css')
+        self.assertRegex(hashed, r'css/site\.[0-9a-f]{12}\.css')
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.root.name, hashed + '.gz'))
+        )
+
+    def test_missing_files_keep_their_name(self):
+        self.assertEqual(
+            staticfiles_storage.stored_name('img/none.png'), 'img/none.png'
+        )
+
+    def test_hashed_files_are_served_compressed_and_immutable(self):
+        hashed = staticfiles_storage.stored_name('css/site.css')
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = serve_static(request, hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        response.close()
+
+
+class MemoryStorage(Storage):
+    """Заглушка объектного хранилища вроде MinIO."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def _save(self, name, content):
+        self.objects[name] = content.read()
+        return name
+
+    def exists(self, name):
+        return name in self.objects
+
+
+class ContentAddressedMemoryStorage(ContentAddressedMixin, MemoryStorage):
+    pass
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+    def test_identical_uploads_are_stored_once(self):
+        with tempfile.TemporaryDirectory() as media:
+            storage = ContentAddressedStorage(location=media)
+            first = storage.save('posts/a.GIF', ContentFile(b'gif'))
+            second = storage.save('posts/b.gif', ContentFile(b'gif'))
+            other = storage.save('posts/c.gif', ContentFile(b'png'))
+            self.assertEqual(first, second)
+            self.assertNotEqual(first, other)
+            self.assertRegex(first, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/'
+                                    r'[0-9a-f]{64}\.gif$')
+            files = [name for _, _, names in os.walk(media) for name in names]
+            self.assertEqual(len(files), 2)
+
+    def test_repeated_upload_refreshes_modified_time(self):
+        with tempfile.TemporaryDirectory() as media:
+            storage = ContentAddressedStorage(location=media)
+            name = storage.save('posts/a.gif', ContentFile(b'gif'))
+            old = time.time() - 60 * 60 * 24
+            os.utime(storage.path(name), (old, old))
+            self.assertEqual(
+                storage.save('posts/b.gif', ContentFile(b'gif')), name
+            )
+            self.assertGreater(os.path.getmtime(storage.path(name)), old + 60)
+
+    def test_mixin_works_with_object_storage(self):
+        storage = ContentAddressedMemoryStorage()
+        first = storage.save('posts/a.jpg', ContentFile(b'jpeg'))
+        second = storage.save('posts/b.jpg', ContentFile(b'jpeg'))
+        self.assertEqual(first, second)
+        self.assertEqual(list(storage.objects.values()), [b'jpeg'])
+
+    def test_thumbnails_keep_predicted_name(self):
+        storage = ContentAddressedMemoryStorage()
+        name = 'cache/1e/ae/1eae33db.jpg'
+        self.assertEqual(storage.save(name, ContentFile(b'jpeg')), name)
+
+
+class PurgeHandler(http.server.BaseHTTPRequestHandler):
+    """Заглушка Varnish: запоминает ключи из запросов PURGE."""
+
+    purged = []
+
+    def do_PURGE(self):
+        self.purged.append(self.headers['Surrogate-Key'])
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class EdgeCacheTest(SimpleTestCase):
+    def anonymous_request(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return request
+
+    def test_cache_policy_for_anonymous(self):
+        view = cache_policy(60, 600)(lambda request: HttpResponse('ok'))
+        response = view(self.anonymous_request())
+        self.assertEqual(
+            set(response['Cache-Control'].split(', ')),
+            {'public', 'max-age=60', 's-maxage=600'}
+        )
+        self.assertEqual(response['Vary'], 'Cookie')
+
+    def test_middleware_sets_keys_and_keeps_cookies_private(self):
+        def view(request):
+            add_surrogate_keys(request, 'post-2', 'feed')
+            response = cache_policy(60)(
+                lambda request: HttpResponse('ok')
+            )(request)
+            response.set_cookie('csrftoken', 'token')
+            return response
+
+        response = EdgeCacheMiddleware(view)(self.anonymous_request())
+        self.assertEqual(response['Surrogate-Key'], 'feed post-2')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+
+    def test_http_purger_sends_purge_with_keys(self):
+        server = http.server.HTTPServer(('127.0.0.1', 0), PurgeHandler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        host, port = server.server_address
+        HttpPurger(f'http://{host}:{port}/').purge(['author-1', 'post-2'])
+        thread.join()
+        server.server_close()
+        self.assertEqual(PurgeHandler.purged, ['author-1 post-2'])
+
+
+calls = []
+
+
+@task(max_attempts=2)
+def remember(value):
+    if value == 'fail':
+        raise ValueError(value)
+    calls.append(value)
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_enqueues_and_worker_runs(self):
+        remember.delay('a')
+        remember.delay(value='b')
+        self.assertEqual(calls, [])
+        self.assertEqual(queue_stats()['queued'], 2)
+        self.assertEqual(work(), 2)
+        self.assertEqual(calls, ['a', 'b'])
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 2)
+
+    def test_claimed_task_is_not_claimed_again(self):
+        remember.delay('a')
+        self.assertEqual(len(claim()), 1)
+        self.assertEqual(claim(), [])
+
+    def test_expired_lease_is_claimed_by_one_worker(self):
+        job = remember.delay('a')
+        expired = timezone.now() - timedelta(seconds=TASK_LEASE + 1)
+        Task.objects.filter(id=job.id).update(
+            status=Task.RUNNING, started=expired
+        )
+        self.assertEqual(len(claim()), 1)
+        self.assertFalse(
+            take(job.id, Task.RUNNING, expired, timezone.now())
+        )
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+
+    def test_failed_task_is_retried_then_given_up(self):
+        job = remember.delay('fail')
+        work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('ValueError', job.error)
+        Task.objects.update(run_at=timezone.now())
+        work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.FAILED, 2))
+        self.assertEqual(queue_stats()['failed'], 1)
+
+    def test_old_done_tasks_are_purged(self):
+        for value in ('old', 'older', 'fresh', 'fail'):
+            remember.delay(value)
+        work()
+        Task.objects.filter(payload__contains='fresh').update(
+            status=Task.DONE, finished=timezone.now() - timedelta(minutes=5)
+        )
+        old = timezone.now() - timedelta(days=2)
+        Task.objects.exclude(payload__contains='fresh').update(finished=old)
+        Task.objects.filter(payload__contains='fail').update(
+            status=Task.FAILED
+        )
+        self.assertEqual(purge_done(limit=1), 2)
+        self.assertEqual(
+            sorted(Task.objects.values_list('status', flat=True)),
+            [Task.DONE, Task.FAILED]
+        )
+
+    @override_settings(TASK_ALWAYS_EAGER=True)
+    def test_eager_mode_skips_the_queue(self):
+        remember.delay('a')
+        self.assertFalse(Task.objects.exists())
+
+
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('5/10s'), (5, 10))
+        with self.assertRaises(ValueError):
+            parse_rate('10 per minute')
+
+    def test_sliding_window_weights_previous_window(self):
+        for _ in range(10):
+            self.assertIsNone(hit('test', 10, 60, now=59))
+        self.assertEqual(hit('test', 10, 60, now=59), 1)
+        # 15 секунд нового окна: от прошлых 11 учитывается 3/4
+        self.assertIsNone(hit('test', 10, 60, now=75))
+        self.assertIsNotNone(hit('test', 10, 60, now=75))
+        self.assertIsNone(hit('other', 10, 60, now=75))
+
+    def test_write_endpoint_returns_429_with_retry_after(self):
+        user = User.objects.create_user(username='bot')
+        self.client.force_login(user)
+        url = reverse('posts:post_create')
+        statuses = [self.client.post(url, {'text': 'Спам'}).status_code
+                    for _ in range(11)]
+        self.assertEqual(statuses[:10], [HTTPStatus.FOUND] * 10)
+        response = self.client.post(url, {'text': 'Спам'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 10)
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.OK
+        )
+
+
+class SessionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db'
+    )
+    def test_feed_requests_do_not_query_session_table(self):
+        self.client.force_login(User.objects.create_user(username='reader'))
+        self.assertEqual(session_queries(self.client, '/', 3), [0, 0, 0])
+
+    def test_clearsessions_deletes_expired_in_batches(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'key{i}',
+                session_data='',
+                expire_date=now + timedelta(days=i - 5, hours=1)
+            )
+            for i in range(6)
+        )
+        out = io.StringIO()
+        call_command('clearsessions', '--batch', '2', stdout=out)
+        self.assertIn('Удалено сессий: 5', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['key5']
+        )
+
+
+class RemoveTestMediaTest(SimpleTestCase):
+    def test_only_media_inside_test_media_dir_is_removed(self):
+        with tempfile.TemporaryDirectory() as root:
+            test_media = os.path.join(root, 'test_media')
+            inside = os.path.join(test_media, 'main')
+            outside = os.path.join(root, 'media')
+            for directory in (inside, outside):
+                os.makedirs(directory)
+            with override_settings(TEST_MEDIA_DIR=test_media,
+                                   MEDIA_ROOT=outside):
+                self.assertFalse(remove_test_media())
+            with override_settings(TEST_MEDIA_DIR=None, MEDIA_ROOT=outside):
+                self.assertFalse(remove_test_media())
+            self.assertTrue(os.path.isdir(outside))
+            with override_settings(TEST_MEDIA_DIR=test_media,
+                                   MEDIA_ROOT=inside):
+                self.assertTrue(remove_test_media())
+            self.assertFalse(os.path.exists(inside))
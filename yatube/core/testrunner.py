@@ -0,0 +1,180 @@
+import os
+import shutil
+import time
+import unittest
+from collections import defaultdict
+
+from django.conf import settings
+from django.test import override_settings
+from django.test import runner
+
+TIMING_TOP: int = 10
+
+
+def remove_test_media():
+    """Удаляет MEDIA_ROOT, только если он внутри `TEST_MEDIA_DIR`.
+
+    Тесты могут запустить и с боевыми настройками (например, через
+    DJANGO_SETTINGS_MODULE), а там в MEDIA_ROOT лежат настоящие
+    загрузки.
+    """
+    test_media = getattr(settings, 'TEST_MEDIA_DIR', None)
+    if not test_media:
+        return False
+    test_media = os.path.realpath(test_media)
+    media = os.path.realpath(settings.MEDIA_ROOT)
+    if os.path.commonpath([media, test_media]) != test_media:
+        return False
+    shutil.rmtree(media, ignore_errors=True)
+    return True
+
+
+class TimingMixin:
+    """Время каждого теста для отчёта раннера.
+
+    В параллельном режиме тесты выполняются в дочерних процессах,
+    а в основной события только воспроизводятся, поэтому время
+    передаётся отдельным событием `addDuration`.
+    """
+
+    def startTest(self, test):
+        self.started = time.perf_counter()
+        self.duration = None
+        super().startTest(test)
+
+    def addDuration(self, test, elapsed):
+        self.duration = elapsed
+
+    def stopTest(self, test):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+        self.durations.append((test.id(), self.duration))
+        super().stopTest(test)
+
+
+class TimingTextTestResult(TimingMixin, unittest.TextTestResult):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+
+
+class TimingDebugSQLTextTestResult(TimingMixin, runner.DebugSQLTextTestResult):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+
+
+class TimingRemoteTestResult(runner.RemoteTestResult):
+    def startTest(self, test):
+        self.started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        elapsed = time.perf_counter() - self.started
+        self.events.append(('addDuration', self.test_index, elapsed))
+        super().stopTest(test)
+
+
+class TimingRemoteTestRunner(runner.RemoteTestRunner):
+    resultclass = TimingRemoteTestResult
+
+
+def init_worker(counter):
+    """Своя копия тестовой БД и свой MEDIA_ROOT на процесс."""
+    runner._init_worker(counter)
+    override_settings(MEDIA_ROOT=os.path.join(
+        settings.MEDIA_ROOT, f'worker-{runner._worker_id}'
+    )).enable()
+
+
+class TimingParallelTestSuite(runner.ParallelTestSuite):
+    init_worker = init_worker
+    runner_class = TimingRemoteTestRunner
+
+
+def module_report(durations):
+    """Строки отчёта: модуль, число тестов и суммарное время."""
+    modules = defaultdict(lambda: [0, 0.0])
+    for test_id, elapsed in durations:
+        module = test_id.rsplit('.', 2)[0]
+        modules[module][0] += 1
+        modules[module][1] += elapsed
+    return sorted(
+        ((module, count, total)
+         for module, (count, total) in modules.items()),
+        key=lambda row: row[2], reverse=True,
+    )
+
+
+class TimingTestRunner(runner.DiscoverRunner):
+    """Раннер `manage.py test` для проекта.
+
+    По умолчанию тестовая БД сохраняется между запусками (`--no-keepdb`
+    пересоздаёт её), тесты идут в процессах по числу ядер, а после
+    прогона печатается время по модулям и самые медленные тесты.
+    """
+
+    parallel_test_suite = TimingParallelTestSuite
+
+    def __init__(self, durations=TIMING_TOP, **kwargs):
+        super().__init__(**kwargs)
+        self.durations = durations
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--no-keepdb', action='store_false', dest='keepdb',
+            help='Пересоздать тестовую БД.',
+        )
+        parser.add_argument(
+            '--durations', type=int, default=TIMING_TOP,
+            help='Сколько самых медленных тестов показать (0 — ни одного).',
+        )
+        parser.set_defaults(
+            keepdb=True, parallel=runner.default_test_processes()
+        )
+
+    def get_resultclass(self):
+        if self.debug_sql:
+            return TimingDebugSQLTextTestResult
+        return TimingTextTestResult
+
+    def run_suite(self, suite, **kwargs):
+        result = super().run_suite(suite, **kwargs)
+        if self.verbosity > 0:
+            self.report(result.durations)
+        return result
+
+    def report(self, durations):
+        lines = ['', 'Время по модулям:']
+        for module, count, total in module_report(durations):
+            lines.append(f'{total:8.2f}s {count:4d}  {module}')
+        if self.durations:
+            lines += ['', f'Самые медленные тесты ({self.durations}):']
+            slowest = sorted(durations, key=lambda row: row[1], reverse=True)
+            for test_id, elapsed in slowest[:self.durations]:
+                lines.append(f'{elapsed:8.2f}s  {test_id}')
+        print('\n'.join(lines))
+
+    def teardown_databases(self, old_config, **kwargs):
+        """Копии БД процессов удаляются всегда, основная — без `keepdb`.
+
+        Копия, оставшаяся с прошлого запуска, не получила бы новых
+        миграций, а скопировать файл заново дешевле, чем их проверять.
+        """
+        for connection, old_name, destroy in old_config:
+            if not destroy:
+                continue
+            if self.parallel > 1:
+                for number in range(1, self.parallel + 1):
+                    connection.creation.destroy_test_db(
+                        suffix=str(number), verbosity=self.verbosity,
+                    )
+            connection.creation.destroy_test_db(
+                old_name, self.verbosity, self.keepdb
+            )
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        remove_test_media()
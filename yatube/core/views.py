@@ -1,4 +1,19 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .compression import SUFFIXES, choose_encoding
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.')
+STATIC_MAX_AGE: int = 60 * 60 * 24 * 365
+UNHASHED_MAX_AGE: int = 60 * 5
 
 
 def page_not_found(request, exception):
@@ -19,3 +34,34 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику, предпочитая заранее сжатые копии."""
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    variants = [encoding for encoding, suffix in SUFFIXES.items()
+                if os.path.isfile(fullpath + suffix)]
+    encoding = choose_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''), variants
+    )
+    content_type, _ = mimetypes.guess_type(fullpath)
+    filename = fullpath + SUFFIXES[encoding] if encoding else fullpath
+    response = FileResponse(
+        open(filename, 'rb'),
+        content_type=content_type or 'application/octet-stream'
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME.search(path):
+        patch_cache_control(
+            response, public=True, max_age=STATIC_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=UNHASHED_MAX_AGE)
+    return response
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment, Follow
+from .models import Post, Group, Comment, Follow, Notification
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -17,7 +17,21 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'post',
+        'created',
+        'read',
+        'emailed',
+    )
+    list_filter = ('read', 'emailed')
+    raw_id_fields = ('user', 'post')
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(Notification, NotificationAdmin)
@@ -0,0 +1,204 @@
+import os
+import posixpath
+import time
+
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .models import Post
+from .thumbnails import discard
+
+GC_CHUNK: int = 500
+GC_MIN_AGE: int = 60 * 60
+
+
+def walk(root, directory):
+    """Файлы каталога хранилища рекурсивно: (имя, размер, mtime).
+
+    os.scandir читает каталог по мере обхода, а в стеке лежат только
+    ещё не пройденные подкаталоги, так что память не растёт с числом
+    файлов.
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = posixpath.join(current, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, stat.st_size, stat.st_mtime
+
+
+def chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Sweep:
+    """Счётчики одного прохода сборщика."""
+
+    def __init__(self, title):
+        self.title = title
+        self.scanned = 0
+        self.orphans = 0
+        self.freed = 0
+        self.started = time.monotonic()
+
+    def orphan(self, size=0):
+        self.orphans += 1
+        self.freed += size
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def __str__(self):
+        elapsed = self.elapsed
+        rate = self.scanned / elapsed if elapsed else 0
+        return (f'{self.title}: просмотрено {self.scanned}, '
+                f'лишних {self.orphans} ({self.freed / 2 ** 20:.1f} МБ) '
+                f'за {elapsed:.1f} с, {rate:.0f} в секунду')
+
+
+class MediaCollector:
+    """Сборщик картинок и миниатюр, на которые ничто не ссылается.
+
+    Хранилище и БД читаются пачками по `chunk`: на пачку файлов
+    приходится один запрос, поэтому проход не зависит от числа файлов
+    ни по памяти, ни по числу запросов на файл. Файлы моложе `min_age`
+    секунд не трогаются: картинка сохраняется раньше, чем пост с ней,
+    а миниатюра — раньше записи о ней в KV store. С `dry_run` только
+    считает. `progress(sweep)` вызывается после каждой пачки.
+    """
+
+    def __init__(self, dry_run=False, chunk=GC_CHUNK, min_age=GC_MIN_AGE,
+                 progress=None):
+        self.root = default_storage.path('')
+        self.dry_run = dry_run
+        self.chunk = chunk
+        self.cutoff = time.time() - min_age
+        self.progress = progress or (lambda sweep: None)
+
+    def run(self):
+        return [self.originals(), self.kvstore(), self.thumbnails()]
+
+    def originals(self):
+        """Загруженные картинки, которых нет ни у одного поста.
+
+        Удаляются вместе с миниатюрами, записанными в KV store. Перед
+        удалением ссылки и время изменения проверяются ещё раз: за время
+        проверки пачки тот же файл могли загрузить заново для нового
+        поста.
+        """
+        sweep = Sweep('Картинки')
+        directory = Post._meta.get_field('image').upload_to.strip('/')
+        for chunk in chunks(walk(self.root, directory), self.chunk):
+            sweep.scanned += len(chunk)
+            orphans = self.unreferenced({
+                name: size for name, size, mtime in chunk
+                if mtime <= self.cutoff
+            })
+            if orphans and not self.dry_run:
+                orphans = self.unreferenced({
+                    name: size for name, size in orphans.items()
+                    if not self.refreshed(name)
+                })
+            for name, size in orphans.items():
+                sweep.orphan(size)
+                if not self.dry_run:
+                    discard(name)
+            self.progress(sweep)
+        return sweep
+
+    def unreferenced(self, files):
+        """Файлы из словаря имя -> размер, которых нет ни у одного поста."""
+        referenced = set(Post.objects.filter(
+            image__in=list(files)
+        ).values_list('image', flat=True))
+        return {name: size for name, size in files.items()
+                if name not in referenced}
+
+    def refreshed(self, name):
+        """Файл моложе `min_age` (его загрузили заново) или уже удалён."""
+        try:
+            mtime = os.stat(os.path.join(self.root, name)).st_mtime
+        except FileNotFoundError:
+            return True
+        return mtime > self.cutoff
+
+    def kvstore(self):
+        """Записи KV store об исходниках, которых нет ни у одного поста.
+
+        Остаются, когда файл удалили в обход сборщика; вместе с ними
+        удаляются миниатюры исходника.
+        """
+        sweep = Sweep('KV store')
+        prefix = add_prefix('', 'image')
+        thumbnail_prefix = thumbnail_settings.THUMBNAIL_PREFIX
+        last = prefix
+        while True:
+            rows = list(KVStoreModel.objects.filter(
+                key__startswith=prefix, key__gt=last
+            ).order_by('key').values_list('key', 'value')[:self.chunk])
+            if not rows:
+                return sweep
+            last = rows[-1][0]
+            sweep.scanned += len(rows)
+            sources = {}
+            for _, value in rows:
+                image_file = deserialize_image_file(value)
+                if not image_file.name.startswith(thumbnail_prefix):
+                    sources[image_file.name] = image_file
+            referenced = set(Post.objects.filter(
+                image__in=list(sources)
+            ).values_list('image', flat=True))
+            for name, image_file in sources.items():
+                if name in referenced or image_file.exists():
+                    continue
+                sweep.orphan()
+                if not self.dry_run:
+                    default.kvstore.delete(image_file)
+            self.progress(sweep)
+
+    def thumbnails(self):
+        """Файлы миниатюр без записи в KV store.
+
+        Такую миниатюру sorl не найдёт, а если исходник жив, создаст
+        заново под тем же именем.
+        """
+        sweep = Sweep('Миниатюры')
+        directory = thumbnail_settings.THUMBNAIL_PREFIX.strip('/')
+        for chunk in chunks(walk(self.root, directory), self.chunk):
+            sweep.scanned += len(chunk)
+            files = {}
+            for name, size, mtime in chunk:
+                key = add_prefix(ImageFile(name, default.storage).key)
+                files[key] = name, size, mtime
+            known = set(KVStoreModel.objects.filter(
+                key__in=list(files)
+            ).values_list('key', flat=True))
+            for key, (name, size, mtime) in files.items():
+                if mtime > self.cutoff or key in known:
+                    continue
+                sweep.orphan(size)
+                if not self.dry_run:
+                    default.storage.delete(name)
+            self.progress(sweep)
+        return sweep
@@ -0,0 +1,54 @@
+from django.db.models import Count
+
+from .models import Post
+
+FEED_FIELDS = (
+    'id',
+    'excerpt',
+    'pub_date',
+    'image',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__slug',
+    'group__title',
+)
+
+
+class FeedQuery:
+    """Построитель queryset для лент постов.
+
+    Загружает автора и группу одним запросом и только те поля,
+    которые выводят шаблоны лент, поэтому число запросов на страницу
+    не зависит от числа постов.
+    """
+
+    def __init__(self, queryset=None):
+        self.queryset = Post.objects.all() if queryset is None else queryset
+
+    def _filter(self, **lookups):
+        self.queryset = self.queryset.filter(**lookups)
+        return self
+
+    def by_author(self, author):
+        return self._filter(author=author)
+
+    def by_group(self, group):
+        return self._filter(group=group)
+
+    def followed_by(self, user):
+        return self._filter(author__following__user=user)
+
+    def newer_than(self, post_id):
+        return self._filter(id__gt=post_id)
+
+    def with_comment_counts(self):
+        self.queryset = self.queryset.annotate(comment_count=Count('comments'))
+        return self
+
+    def build(self):
+        return self.queryset.select_related('author', 'group').only(
+            *FEED_FIELDS
+        )
@@ -1,5 +1,6 @@
 from django import forms
 
+from .images import downsize, validate_image
 from .models import Post, Comment
 
 
@@ -8,6 +9,13 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image', )
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not hasattr(image, 'image'):
+            return image
+        validate_image(image)
+        return downsize(image)
+
 
 class CommentForm(forms.ModelForm):
 
@@ -0,0 +1,166 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+GRAPH_TIMEOUT: int = 60 * 60
+GRAPH_LOCAL_TIMEOUT: int = 30
+SUGGESTIONS: int = 5
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+
+def contains(ids, value):
+    """Бинарный поиск в отсортированном массиве."""
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+def graph_timeout():
+    """Срок жизни массивов графа в кеше.
+
+    Версии меняет процесс, обработавший подписку. Если кеш у каждого
+    процесса свой (`SHARED_CACHE` выключен), остальные процессы
+    узнают о подписке только по истечении срока, поэтому он короткий.
+    """
+    return GRAPH_TIMEOUT if settings.SHARED_CACHE else GRAPH_LOCAL_TIMEOUT
+
+
+class FollowGraph:
+    """Граф подписок в кеше.
+
+    Для каждого пользователя хранятся отсортированные массивы id
+    авторов, на которых он подписан, и его подписчиков. Массивы
+    строятся из БД при промахе.
+
+    Ключи массивов содержат версию пользователя. Подписка и отписка
+    не правят массивы в кеше, а после коммита меняют версии обоих
+    участников: следующее чтение загрузит граф из БД заново. Чтение,
+    начатое до записи, сохранит устаревший массив под старой версией,
+    которую уже никто не спросит.
+    """
+
+    def _version_key(self, user_id):
+        return f'follow-graph:version:{user_id}'
+
+    def _versions(self, user_ids):
+        keys = {self._version_key(user_id): user_id for user_id in user_ids}
+        versions = cache.get_many(keys)
+        missing = [key for key in keys if key not in versions]
+        if missing:
+            for key in missing:
+                cache.add(key, uuid4().hex, None)
+            versions.update(cache.get_many(missing))
+        return {keys[key]: version for key, version in versions.items()}
+
+    def _key(self, direction, user_id, version):
+        return f'follow-graph:{direction}:{user_id}:{version}'
+
+    def _query(self, direction, user_ids):
+        if direction == FOLLOWING:
+            return Follow.objects.filter(user_id__in=user_ids).values_list(
+                'user_id', 'author_id'
+            )
+        return Follow.objects.filter(author_id__in=user_ids).values_list(
+            'author_id', 'user_id'
+        )
+
+    def _load_many(self, direction, user_ids):
+        versions = self._versions(user_ids)
+        keys = {self._key(direction, user_id, versions.get(user_id)): user_id
+                for user_id in user_ids}
+        cached = cache.get_many(keys)
+        graph = {keys[key]: ids for key, ids in cached.items()}
+        missing = [user_id for user_id in user_ids if user_id not in graph]
+        if missing:
+            edges = {user_id: set() for user_id in missing}
+            for owner, other in self._query(direction, missing):
+                edges[owner].add(other)
+            loaded = {user_id: array('l', sorted(ids))
+                      for user_id, ids in edges.items()}
+            cache.set_many(
+                {self._key(direction, user_id, versions.get(user_id)): ids
+                 for user_id, ids in loaded.items()},
+                graph_timeout()
+            )
+            graph.update(loaded)
+        return graph
+
+    def _load(self, direction, user_id):
+        return self._load_many(direction, [user_id])[user_id]
+
+    def following(self, user_id):
+        return self._load(FOLLOWING, user_id)
+
+    def followers(self, user_id):
+        return self._load(FOLLOWERS, user_id)
+
+    def is_following(self, user_id, author_id):
+        if user_id is None:
+            return False
+        return contains(self.following(user_id), author_id)
+
+    def followers_count(self, user_id):
+        return len(self.followers(user_id))
+
+    def mutual(self, user_id):
+        """Пользователи, подписанные взаимно с `user_id`."""
+        followers = self.followers(user_id)
+        return [author_id for author_id in self.following(user_id)
+                if contains(followers, author_id)]
+
+    def suggestions(self, user_id, limit=SUGGESTIONS):
+        """Кого почитать: авторы, на которых подписаны ваши авторы."""
+        following = self.following(user_id)
+        candidates = Counter()
+        for ids in self._load_many(FOLLOWING, list(following)).values():
+            candidates.update(ids)
+        return [
+            candidate for candidate, _ in candidates.most_common()
+            if candidate != user_id and not contains(following, candidate)
+        ][:limit]
+
+    def invalidate(self, *user_ids):
+        """Новые версии графа пользователей.
+
+        Внутри транзакции версии меняются ещё раз после коммита: чтение
+        между сменой версий и коммитом видит старые подписки.
+        """
+        def bump():
+            cache.set_many({self._version_key(user_id): uuid4().hex
+                            for user_id in user_ids}, None)
+
+        bump()
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(bump)
+
+    def follow(self, user_id, *author_ids):
+        """Подписка на авторов одним INSERT ... ON CONFLICT DO NOTHING."""
+        author_ids = [author_id for author_id in author_ids
+                      if author_id != user_id]
+        Follow.objects.bulk_create(
+            [Follow(user_id=user_id, author_id=author_id)
+             for author_id in author_ids],
+            ignore_conflicts=True
+        )
+        if author_ids:
+            self.invalidate(user_id, *author_ids)
+
+    def unfollow(self, user_id, *author_ids):
+        """Отписка от авторов одним DELETE."""
+        deleted, _ = Follow.objects.filter(
+            user_id=user_id, author_id__in=author_ids
+        ).delete()
+        if deleted:
+            self.invalidate(user_id, *author_ids)
+        return deleted
+
+
+follow_graph = FollowGraph()
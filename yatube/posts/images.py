@@ -0,0 +1,66 @@
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
+
+IMAGE_MAX_SIZE: int = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS: int = 24_000_000
+IMAGE_MAX_SIDE: int = 2560
+SPOOL_MAX_SIZE: int = 1024 * 1024
+DOWNSIZE_FORMATS = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+}
+
+
+def validate_image(upload):
+    """Проверяет размер файла и число пикселей по заголовку.
+
+    `upload.image` — объект Pillow, открытый полем формы: к этому
+    моменту прочитан только заголовок, сами пиксели не декодированы.
+    """
+    if upload.size > IMAGE_MAX_SIZE:
+        raise ValidationError(
+            f'Файл больше {IMAGE_MAX_SIZE // (1024 * 1024)} МБ.'
+        )
+    width, height = upload.image.size
+    if width * height > IMAGE_MAX_PIXELS:
+        raise ValidationError('Слишком большое разрешение картинки.')
+
+
+def open_upload(upload):
+    if hasattr(upload, 'temporary_file_path'):
+        return Image.open(upload.temporary_file_path())
+    upload.seek(0)
+    return Image.open(upload)
+
+
+def downsize(upload):
+    """Уменьшает слишком большие картинки, не декодируя их целиком.
+
+    Для JPEG `draft` декодирует сразу в уменьшенном масштабе, так что
+    память ограничена размером результата. Анимированные GIF и
+    форматы без поддержки записи возвращаются как есть.
+    """
+    width, height = upload.image.size
+    image_format = upload.image.format
+    if (max(width, height) <= IMAGE_MAX_SIDE
+            or image_format not in DOWNSIZE_FORMATS):
+        return upload
+    with open_upload(upload) as image:
+        image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        content = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        image.save(content, image_format)
+    size = content.tell()
+    content.seek(0)
+    upload.close()
+    return UploadedFile(
+        content,
+        os.path.basename(upload.name),
+        DOWNSIZE_FORMATS[image_format],
+        size
+    )
@@ -0,0 +1,31 @@
+from django.db import transaction
+
+from core.events import publish
+
+from .graph import follow_graph
+
+FEED_CHANNEL = 'feed'
+INDEX = 'index'
+FOLLOW = 'follow'
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+def channels(feed, user_id):
+    """Каналы событий ленты для `core.sse.EventStream`."""
+    if feed == INDEX:
+        return [FEED_CHANNEL]
+    if feed == FOLLOW and user_id is not None:
+        return [author_channel(author_id)
+                for author_id in follow_graph.following(user_id)]
+    return None
+
+
+def publish_post(post):
+    """После фиксации сообщает лентам о новом посте."""
+    def send():
+        publish(FEED_CHANNEL, post.id)
+        publish(author_channel(post.author_id), post.id)
+    transaction.on_commit(send)
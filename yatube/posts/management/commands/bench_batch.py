@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+def percentile(latencies, share):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class Command(BaseCommand):
+    help = ('Меряет задержку профиля и поста с последовательными '
+            'и параллельными запросами к БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        author = User.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').first()
+        post = Post.objects.order_by('-id').first()
+        if author is None or post is None:
+            raise CommandError('Нет данных: запустите manage.py seed.')
+        paths = (
+            reverse('posts:profile', args=[author.username]),
+            reverse('posts:post_detail', args=[post.id]),
+        )
+        modes = (1, options['workers'])
+        for path in paths:
+            latencies = self.bench(path, modes, options['requests'])
+            for workers in modes:
+                self.report(workers, path, latencies[workers])
+
+    def bench(self, path, modes, requests):
+        """Режимы чередуются запрос за запросом, чтобы прогрев и фоновая
+        нагрузка доставались им поровну. REMOTE_ADDR вне INTERNAL_IPS
+        выключает debug toolbar: он пишет только запросы основного
+        потока и сделал бы пул мнимо быстрее.
+        """
+        client = Client(HTTP_HOST='localhost', REMOTE_ADDR='192.0.2.1')
+        latencies = {workers: [] for workers in modes}
+        for _ in range(requests + 1):
+            for workers in modes:
+                with override_settings(QUERY_BATCH_WORKERS=workers):
+                    start = time.perf_counter()
+                    client.get(path)
+                    latencies[workers].append(time.perf_counter() - start)
+        return {workers: values[1:] for workers, values in latencies.items()}
+
+    def report(self, workers, path, latencies):
+        mode = 'последовательно' if workers < 2 else f'пул {workers}'
+        self.stdout.write(
+            f'{path} ({mode}): '
+            f'p50 {percentile(latencies, 0.5) * 1000:.1f} ms, '
+            f'p95 {percentile(latencies, 0.95) * 1000:.1f} ms'
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.cleanup import GC_CHUNK, GC_MIN_AGE, MediaCollector
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки постов и миниатюры, на которые ничто '
+            'не ссылается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не удалять.'
+        )
+        parser.add_argument('--chunk', type=int, default=GC_CHUNK)
+        parser.add_argument(
+            '--min-age', type=int, default=GC_MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд.'
+        )
+
+    def handle(self, *args, **options):
+        progress = None
+        if options['verbosity'] > 1:
+            progress = self.report
+        try:
+            collector = MediaCollector(
+                dry_run=options['dry_run'], chunk=options['chunk'],
+                min_age=options['min_age'], progress=progress,
+            )
+        except NotImplementedError:
+            raise CommandError('Хранилище медиа не на локальном диске.')
+        for sweep in collector.run():
+            self.stdout.write(str(sweep))
+        if options['dry_run']:
+            self.stdout.write('Пробный запуск: ничего не удалено.')
+
+    def report(self, sweep):
+        self.stdout.write(str(sweep))
@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seed import SEED_BATCH, SEED_DAYS, Seeder
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Наполняет БД правдоподобными данными: подписки по степенному '
+            'закону, посты всплесками, обсуждения и картинки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя.'
+        )
+        parser.add_argument('--images', type=int, default=20)
+        parser.add_argument('--image-share', type=float, default=0.3)
+        parser.add_argument('--days', type=int, default=SEED_DAYS)
+        parser.add_argument('--batch', type=int, default=SEED_BATCH)
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Начало имён пользователей и адресов групп.'
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Пользователи с префиксом {prefix!r} уже есть, '
+                f'выберите другой --prefix.'
+            )
+        seeder = Seeder(
+            users=options['users'], groups=options['groups'],
+            posts=options['posts'], comments=options['comments'],
+            follows=options['follows'], images=options['images'],
+            image_share=options['image_share'], seed=options['seed'],
+            prefix=prefix, days=options['days'], batch=options['batch'],
+        )
+        start = time.monotonic()
+        created = seeder.run()
+        elapsed = time.monotonic() - start
+        cache.clear()
+        for name, count in created.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(f'Готово за {elapsed:.1f} с')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import DIGEST_BATCH, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Рассылает письма с новыми записями авторов из подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=DIGEST_BATCH)
+
+    def handle(self, *args, **options):
+        sent = send_digests(options['batch'])
+        self.stdout.write(f'Отправлено писем: {sent}')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import warm
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для картинок свежих постов во всех размерах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('image')
+        warmed = 0
+        for post in posts[:options['count']]:
+            warmed += warm(post.image)
+        self.stdout.write(f'Готово миниатюр: {warmed}')
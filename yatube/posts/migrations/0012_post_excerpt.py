@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:41
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 300
+CHUNK_SIZE = 1000
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    chunk = []
+    for post in Post.objects.only('id', 'text').iterator(CHUNK_SIZE):
+        post.excerpt = Truncator(post.text).chars(EXCERPT_LENGTH)
+        chunk.append(post)
+        if len(chunk) == CHUNK_SIZE:
+            Post.objects.bulk_update(chunk, ['excerpt'])
+            chunk = []
+    Post.objects.bulk_update(chunk, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_follow_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Отрывок'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
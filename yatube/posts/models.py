@@ -1,13 +1,33 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.text import Truncator
 
 User = get_user_model()
 
 POST_LIST: int = 15
+EXCERPT_LENGTH: int = 300
+
+
+def make_excerpt(text):
+    return Truncator(text).chars(EXCERPT_LENGTH)
+
+
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for post in objs:
+            post.excerpt = make_excerpt(post.text)
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class Post(models.Model):
     text = models.TextField(verbose_name='Текстовое поле')
+    excerpt = models.CharField(
+        'Отрывок',
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(auto_now_add=True, verbose_name='Дата')
     author = models.ForeignKey(
         User,
@@ -29,9 +49,26 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(post):
         return (f'{post.text[:POST_LIST]}')
 
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+    @property
+    def surrogate_keys(self):
+        """Ключи CDN страниц, на которых показан пост."""
+        keys = [f'post-{self.pk}', f'author-{self.author_id}']
+        if self.group_id:
+            keys.append(f'group-{self.group_id}')
+        return keys
+
     class Meta:
         ordering = ('-pub_date', )
 
@@ -84,3 +121,48 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'
+            ),
+        )
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Новый пост'
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    read = models.BooleanField('Прочитано', default=False)
+    emailed = models.BooleanField('Отправлено письмом', default=False)
+
+    class Meta:
+        ordering = ('-created', )
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_notification'
+            ),
+        )
+        indexes = (
+            models.Index(fields=('user', 'read'), name='unread'),
+            models.Index(fields=('emailed', 'user'), name='digest'),
+        )
@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.urls import reverse
+
+from .models import Follow, Notification
+
+FANOUT_CHUNK: int = 500
+DIGEST_BATCH: int = 100
+DIGEST_POSTS: int = 20
+UNREAD_TIMEOUT: int = 60 * 5
+DIGEST_SUBJECT = 'Новые записи авторов, на которых вы подписаны'
+
+
+def unread_key(user_id):
+    return f'notifications-unread:{user_id}'
+
+
+def fan_out(post, after_id=0, chunk=FANOUT_CHUNK):
+    """Уведомляет пачку подписчиков автора с id больше `after_id`.
+
+    Возвращает id последнего подписчика пачки или None, если
+    подписчики закончились.
+    """
+    follower_ids = list(Follow.objects.filter(
+        author_id=post.author_id, user_id__gt=after_id
+    ).order_by('user_id').values_list('user_id', flat=True)[:chunk])
+    Notification.objects.bulk_create(
+        [Notification(user_id=user_id, post_id=post.id)
+         for user_id in follower_ids],
+        ignore_conflicts=True
+    )
+    cache.delete_many([unread_key(user_id) for user_id in follower_ids])
+    if len(follower_ids) < chunk:
+        return None
+    return follower_ids[-1]
+
+
+def unread_count(user_id):
+    key = unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            user_id=user_id, read=False
+        ).count()
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def mark_read(user_id):
+    """Отмечает прочитанными все уведомления пользователя."""
+    if unread_count(user_id):
+        Notification.objects.filter(user_id=user_id, read=False).update(
+            read=True
+        )
+        cache.set(unread_key(user_id), 0, UNREAD_TIMEOUT)
+
+
+def absolute_url(path):
+    """Полный адрес страницы сайта для писем: `SITE_URL` + путь."""
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def digest_message(user, notifications):
+    lines = []
+    for notification in notifications[:DIGEST_POSTS]:
+        post = notification.post
+        url = absolute_url(reverse('posts:post_detail', args=[post.id]))
+        lines.append(f'{post.author.username}: {post.excerpt[:80]}\n{url}')
+    if len(notifications) > DIGEST_POSTS:
+        lines.append(f'И ещё записей: {len(notifications) - DIGEST_POSTS}')
+    return EmailMessage(
+        DIGEST_SUBJECT,
+        '\n\n'.join(lines),
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email],
+    )
+
+
+def send_digests(batch=DIGEST_BATCH):
+    """Рассылает по одному письму на пользователя с новыми записями.
+
+    Уведомления, уже прочитанные на сайте, в письмо не попадают.
+
+    Получатели обрабатываются пачками по `batch`, письма пачки
+    отправляются через одно соединение. Возвращает число писем.
+    """
+    sent = 0
+    connection = get_connection()
+    while True:
+        user_ids = list(Notification.objects.filter(
+            emailed=False, read=False
+        ).order_by('user_id').values_list(
+            'user_id', flat=True
+        ).distinct()[:batch])
+        if not user_ids:
+            return sent
+        pending = Notification.objects.filter(
+            emailed=False, read=False, user_id__in=user_ids
+        ).select_related(
+            'user', 'post__author'
+        ).order_by('user_id', '-created')
+        by_user = {}
+        ids = []
+        for notification in pending:
+            by_user.setdefault(notification.user, []).append(notification)
+            ids.append(notification.id)
+        messages = [digest_message(user, notifications)
+                    for user, notifications in by_user.items()
+                    if user.email]
+        sent += connection.send_messages(messages) or 0
+        Notification.objects.filter(id__in=ids).update(emailed=True)
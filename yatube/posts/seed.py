@@ -0,0 +1,275 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SEED_BATCH: int = 1000
+SEED_DAYS: int = 90
+SEED_SENTENCES: int = 500
+SEED_PASSWORD = 'password'
+ZIPF_EXPONENT: float = 1.1
+BURST_SIZE: float = 4.0
+BURST_GAP: int = 10 * 60
+REPLY_DELAY: int = 3 * 60 * 60
+REPLY_GAP: int = 5 * 60
+IMAGE_SIZE = (120, 80)
+
+
+def popularity(count, rng, exponent=ZIPF_EXPONENT):
+    """Веса по закону Ципфа: вес ранга r равен r ** -exponent.
+
+    Ранги перемешаны, чтобы популярность не зависела от порядка
+    создания.
+    """
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return [rank ** -exponent for rank in ranks]
+
+
+def burst(rng, mean):
+    """Размер всплеска: не меньше одного, в среднем `mean`."""
+    return 1 + int(rng.expovariate(1 / max(mean - 1, 1e-9)))
+
+
+def new_ids(model, objs):
+    """bulk_create и id созданных строк по возрастанию.
+
+    SQLite не возвращает id из bulk_create, поэтому они читаются
+    обратно: всё, что больше прежнего максимума. Размер пачки
+    вставки Django выбирает сам под ограничения бэкенда.
+    """
+    last = model.objects.aggregate(last=Max('id'))['last'] or 0
+    model.objects.bulk_create(objs)
+    return list(model.objects.filter(id__gt=last).order_by('id')
+                .values_list('id', flat=True))
+
+
+def set_column(model, field_name, values):
+    """Проставляет столбец по парам (id, значение).
+
+    Даты с auto_now_add bulk_create перезаписывает текущим временем,
+    поэтому их приходится обновлять после вставки. bulk_update строит
+    для каждой пачки CASE по всем её строкам, а executemany с UPDATE
+    по первичному ключу в разы быстрее.
+    """
+    field = model._meta.get_field(field_name)
+    quote = connection.ops.quote_name
+    sql = (f'UPDATE {quote(model._meta.db_table)} '
+           f'SET {quote(field.column)} = %s '
+           f'WHERE {quote(model._meta.pk.column)} = %s')
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            (field.get_db_prep_value(value, connection), pk)
+            for pk, value in values
+        ])
+
+
+class Seeder:
+    """Генератор правдоподобных данных для локальной отладки.
+
+    Всё строится пачками через bulk_create и зависит только от
+    `seed` и `now`:
+
+    - подписчики распределены по степенному закону: немного
+      авторов-звёзд и длинный хвост;
+    - те же звёзды пишут больше всех, посты идут всплесками;
+    - комментарии собираются в обсуждения популярных постов;
+    - часть постов с картинками из небольшого набора файлов.
+
+    Подходит и тестам (маленькие объёмы), и бенчмаркам, и команде
+    `manage.py seed`.
+    """
+
+    def __init__(self, users=1000, groups=20, posts=20000, comments=50000,
+                 follows=20, images=20, image_share=0.3, seed=0,
+                 prefix='seed', now=None, days=SEED_DAYS, batch=SEED_BATCH):
+        self.counts = {
+            'users': users, 'groups': groups, 'posts': posts,
+            'comments': comments, 'images': images,
+        }
+        self.follows = follows
+        self.image_share = image_share
+        self.prefix = prefix
+        self.now = now or timezone.now()
+        self.days = days
+        self.batch = batch
+        self.rng = random.Random(seed)
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        self.fake = fake
+        self.sentences = [fake.sentence() for _ in range(SEED_SENTENCES)]
+
+    def text(self, sentences):
+        return ' '.join(self.rng.choices(self.sentences, k=sentences))
+
+    def run(self):
+        """Создаёт данные в одной транзакции; возвращает число строк."""
+        with transaction.atomic():
+            user_ids = self.create_users()
+            weights = popularity(len(user_ids), self.rng)
+            cumulative = list(accumulate(weights))
+            created = {
+                'users': len(user_ids),
+                'follows': self.create_follows(user_ids, cumulative),
+            }
+            group_ids = self.create_groups()
+            posts = self.create_posts(
+                user_ids, cumulative, group_ids, self.create_images()
+            )
+            created['groups'] = len(group_ids)
+            created['posts'] = len(posts)
+            created['comments'] = self.create_comments(
+                user_ids, dict(zip(user_ids, weights)), posts
+            )
+        return created
+
+    def create_users(self):
+        password = make_password(SEED_PASSWORD)
+        return new_ids(User, (
+            User(
+                username=f'{self.prefix}{number}',
+                email=f'{self.prefix}{number}@example.com',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            )
+            for number in range(self.counts['users'])
+        ))
+
+    def create_follows(self, user_ids, cumulative):
+        """Подписки; число подписок читателя распределено экспоненциально.
+
+        Авторов выбирают по весам популярности, поэтому число
+        подписчиков подчиняется степенному закону. Подписок не больше
+        половины пользователей, иначе добор до нужного числа тянет
+        из хвоста слишком долго.
+        """
+        rng = self.rng
+        follows = []
+        created = 0
+        for user_id in user_ids:
+            wanted = 0
+            if self.follows:
+                wanted = min(len(user_ids) // 2,
+                             int(rng.expovariate(1 / self.follows)))
+            authors = set()
+            while len(authors) < wanted:
+                authors.update(rng.choices(
+                    user_ids, cum_weights=cumulative, k=wanted - len(authors)
+                ))
+                authors.discard(user_id)
+            follows.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in sorted(authors)
+            )
+            if len(follows) >= self.batch:
+                Follow.objects.bulk_create(follows)
+                created += len(follows)
+                follows = []
+        Follow.objects.bulk_create(follows)
+        return created + len(follows)
+
+    def create_groups(self):
+        return new_ids(Group, (
+            Group(
+                title=self.fake.sentence(nb_words=3).rstrip('.'),
+                slug=f'{self.prefix}-{number}',
+                description=self.text(2),
+            )
+            for number in range(self.counts['groups'])
+        ))
+
+    def create_images(self):
+        """Небольшой набор картинок, общий для всех постов."""
+        names = []
+        for number in range(self.counts['images']):
+            content = BytesIO()
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            Image.new('RGB', IMAGE_SIZE, color).save(content, 'PNG')
+            names.append(default_storage.save(
+                f'posts/{self.prefix}-{number}.png',
+                ContentFile(content.getvalue())
+            ))
+        return names
+
+    def create_posts(self, user_ids, cumulative, group_ids, images):
+        """Посты всплесками; возвращает тройки (id, дата, автор) по дате.
+
+        Посты создаются по возрастанию даты, как на сайте, поэтому id
+        и pub_date растут вместе.
+        """
+        if not user_ids:
+            return []
+        rng = self.rng
+        window = self.days * 24 * 60 * 60
+        drafts = []
+        while len(drafts) < self.counts['posts']:
+            author_id = rng.choices(user_ids, cum_weights=cumulative)[0]
+            moment = self.now - timedelta(seconds=rng.uniform(0, window))
+            for _ in range(burst(rng, BURST_SIZE)):
+                moment += timedelta(seconds=rng.expovariate(1 / BURST_GAP))
+                drafts.append((min(moment, self.now), author_id))
+        drafts = sorted(drafts[:self.counts['posts']])
+        post_ids = new_ids(Post, (
+            Post(
+                author_id=author_id,
+                text=self.text(rng.randint(1, 8)),
+                group_id=(rng.choice(group_ids)
+                          if group_ids and rng.random() < 0.5 else None),
+                image=(rng.choice(images)
+                       if images and rng.random() < self.image_share else ''),
+            )
+            for _, author_id in drafts
+        ))
+        set_column(Post, 'pub_date', (
+            (post_id, moment) for post_id, (moment, _) in zip(post_ids, drafts)
+        ))
+        return [(post_id, moment, author_id) for post_id, (moment, author_id)
+                in zip(post_ids, drafts)]
+
+    def create_comments(self, user_ids, weights, posts):
+        """Обсуждения: чем популярнее автор, тем больше комментариев.
+
+        У комментариев нет ответов друг на друга, поэтому вместо
+        деревьев получаются всплески реплик под постом.
+        """
+        if not posts:
+            return 0
+        rng = self.rng
+        post_weights = list(accumulate(
+            weights[author_id] for _, _, author_id in posts
+        ))
+        drafts = []
+        while len(drafts) < self.counts['comments']:
+            post_id, moment, _ = rng.choices(posts,
+                                             cum_weights=post_weights)[0]
+            moment += timedelta(seconds=rng.expovariate(1 / REPLY_DELAY))
+            for _ in range(burst(rng, BURST_SIZE)):
+                moment += timedelta(seconds=rng.expovariate(1 / REPLY_GAP))
+                drafts.append((min(moment, self.now), post_id,
+                               rng.choice(user_ids)))
+        drafts = sorted(drafts[:self.counts['comments']])
+        comment_ids = new_ids(Comment, (
+            Comment(post_id=post_id, author_id=author_id,
+                    text=self.text(rng.randint(1, 3)))
+            for _, post_id, author_id in drafts
+        ))
+        set_column(Comment, 'created', (
+            (comment_id, moment)
+            for comment_id, (moment, _, _) in zip(comment_ids, drafts)
+        ))
+        return len(comment_ids)
@@ -0,0 +1,39 @@
+from core.tasks import task
+
+from .models import Post
+from .notifications import fan_out
+from .thumbnails import discard, modified_after, warm
+
+
+@task
+def warm_post_thumbnails(post_id):
+    """Миниатюры новой картинки поста, чтобы лента не ждала их."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        warm(post.image)
+
+
+@task
+def fan_out_post(post_id, after_id=0):
+    """Уведомления подписчикам пачками: следующая пачка — новая задача."""
+    post = Post.objects.filter(pk=post_id).only('author_id').first()
+    if post is None:
+        return
+    last_id = fan_out(post, after_id)
+    if last_id is not None:
+        fan_out_post.delay(post_id, last_id)
+
+
+@task
+def discard_image(name, since=None):
+    """Удаляет заменённую картинку, если на файл не ссылается другой пост.
+
+    Хранилище складывает одинаковые файлы в один, так что та же
+    картинка может быть и у других постов. Файл, загруженный заново
+    после `since` (время замены, timestamp), не удаляется: пост с ним
+    мог ещё не сохраниться; такой файл потом проверит сборщик мусора.
+    """
+    if since is not None and modified_after(name, since):
+        return
+    if not Post.objects.filter(image=name).exists():
+        discard(name)
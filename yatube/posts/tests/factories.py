@@ -0,0 +1,89 @@
+import itertools
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+_sequence = itertools.count()
+
+
+@lru_cache(maxsize=None)
+def image_bytes(size=(30, 10), color=(200, 0, 0), image_format='PNG'):
+    """Байты картинки; одинаковые картинки рисуются один раз."""
+    content = BytesIO()
+    Image.new('RGB', size, color=color).save(content, image_format)
+    return content.getvalue()
+
+
+def image_file(name='small.gif', content=SMALL_GIF,
+               content_type='image/gif', **image):
+    """Загружаемый файл: по умолчанию маленький GIF.
+
+    С аргументами `size`, `color`, `image_format` рисуется
+    картинка через `image_bytes`.
+    """
+    if image:
+        content = image_bytes(**image)
+    return SimpleUploadedFile(name, content, content_type=content_type)
+
+
+def make_user(**fields):
+    fields.setdefault('username', f'user{next(_sequence)}')
+    return User.objects.create_user(**fields)
+
+
+def make_group(**fields):
+    number = next(_sequence)
+    fields.setdefault('title', f'Группа {number}')
+    fields.setdefault('slug', f'group-{number}')
+    fields.setdefault('description', 'Описание группы')
+    return Group.objects.create(**fields)
+
+
+def make_post(**fields):
+    if 'author' not in fields:
+        fields['author'] = make_user()
+    fields.setdefault('text', f'Текст поста {next(_sequence)}')
+    return Post.objects.create(**fields)
+
+
+class TempMediaMixin:
+    """Свой MEDIA_ROOT на класс тестов, удаляется после класса.
+
+    Каталог создаётся внутри MEDIA_ROOT процесса при запуске класса,
+    поэтому параллельные процессы раннера не делят файлы.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+        cls.media_root = tempfile.mkdtemp(dir=settings.MEDIA_ROOT)
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
@@ -0,0 +1,120 @@
+import os
+import shutil
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.cleanup import MediaCollector
+from posts.tests.factories import (
+    TempMediaMixin, image_bytes, image_file, make_post
+)
+from posts.thumbnails import FEED_GEOMETRY, THUMBNAIL_OPTIONS, warm
+
+
+class MediaCollectorTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        shutil.rmtree(self.media_root)
+        os.makedirs(self.media_root)
+        cache.clear()
+        default.kvstore.local.clear()
+        self.post = make_post(image=image_file('kept.png', color=(0, 90, 0)))
+        warm(self.post.image)
+        self.orphan = default_storage.save(
+            'posts/orphan.png', ContentFile(image_bytes(color=(0, 0, 90)))
+        )
+        self.orphan_thumbnail = get_thumbnail(
+            self.orphan, FEED_GEOMETRY, **THUMBNAIL_OPTIONS
+        )
+        self.stray = default_storage.save(
+            'cache/00/00/stray.jpg', ContentFile(b'stray')
+        )
+
+    def kept_thumbnail(self):
+        return get_thumbnail(self.post.image, FEED_GEOMETRY,
+                             **THUMBNAIL_OPTIONS)
+
+    def test_removes_only_unreferenced_files(self):
+        originals, kvstore, thumbnails = MediaCollector(min_age=0).run()
+        self.assertEqual(originals.orphans, 1)
+        self.assertEqual(thumbnails.orphans, 1)
+        self.assertTrue(default_storage.exists(self.post.image.name))
+        self.assertTrue(self.kept_thumbnail().exists())
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertFalse(self.orphan_thumbnail.exists())
+        self.assertFalse(default_storage.exists(self.stray))
+
+    def test_removes_kvstore_entries_of_missing_files(self):
+        source = ImageFile(self.orphan, default_storage)
+        os.remove(default_storage.path(self.orphan))
+        _, kvstore, _ = MediaCollector(min_age=0).run()
+        self.assertEqual(kvstore.orphans, 1)
+        self.assertIsNone(default.kvstore.get(source))
+        self.assertFalse(self.orphan_thumbnail.exists())
+        self.assertIsNotNone(default.kvstore.get(ImageFile(self.post.image)))
+
+    def test_dry_run_deletes_nothing(self):
+        originals, _, thumbnails = MediaCollector(
+            dry_run=True, min_age=0
+        ).run()
+        self.assertEqual(originals.orphans, 1)
+        self.assertEqual(thumbnails.orphans, 1)
+        self.assertTrue(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.stray))
+
+    def test_fresh_files_are_kept(self):
+        old = time.time() - 2 * 60 * 60
+        os.utime(default_storage.path(self.orphan), (old, old))
+        originals, _, thumbnails = MediaCollector().run()
+        self.assertEqual(originals.orphans, 1)
+        self.assertEqual(thumbnails.orphans, 0)
+        self.assertTrue(default_storage.exists(self.stray))
+
+    def test_reuploaded_orphan_is_kept(self):
+        old = time.time() - 2 * 60 * 60
+        os.utime(default_storage.path(self.orphan), (old, old))
+        again = default_storage.save(
+            'posts/again.png', ContentFile(image_bytes(color=(0, 0, 90)))
+        )
+        self.assertEqual(again, self.orphan)
+        originals, _, _ = MediaCollector().run()
+        self.assertEqual(originals.orphans, 0)
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_orphan_referenced_during_the_sweep_is_kept(self):
+        orphan, author = self.orphan, self.post.author
+
+        class RacingCollector(MediaCollector):
+            def unreferenced(self, files):
+                orphans = super().unreferenced(files)
+                if orphan in orphans:
+                    make_post(author=author, image=orphan)
+                return orphans
+
+        originals = RacingCollector(min_age=0).originals()
+        self.assertEqual(originals.orphans, 0)
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_small_chunks_give_the_same_result(self):
+        chunks = []
+        originals, _, thumbnails = MediaCollector(
+            chunk=1, min_age=0, progress=chunks.append
+        ).run()
+        self.assertEqual((originals.scanned, originals.orphans), (2, 1))
+        self.assertEqual(thumbnails.orphans, 1)
+        self.assertGreater(len(chunks), 3)
+
+    def test_command_reports_every_phase(self):
+        out = StringIO()
+        call_command('gc_media', '--dry-run', '--min-age', '0', stdout=out)
+        output = out.getvalue()
+        for title in ('Картинки', 'KV store', 'Миниатюры'):
+            self.assertIn(title, output)
+        self.assertIn('ничего не удалено', output)
+        self.assertTrue(default_storage.exists(self.orphan))
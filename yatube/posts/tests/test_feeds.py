@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.feeds import FeedQuery
+from posts.live import author_channel, channels
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import NUMBER
+
+User = get_user_model()
+
+
+class FeedQueryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='feed-group', description='Описание'
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{i}', first_name='Имя', last_name=str(i)
+            )
+            for i in range(3)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=cls.reader, author=author) for author in cls.authors
+        )
+        for author in cls.authors:
+            Post.objects.create(author=author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feed_loads_template_fields_in_one_query(self):
+        with self.assertNumQueries(1):
+            for post in FeedQuery().build():
+                post.author.get_full_name()
+                str(post.author)
+                post.group.slug
+                post.image
+                post.excerpt
+
+    def test_feed_defers_full_text(self):
+        post = FeedQuery().build().first()
+        self.assertIn('text', post.get_deferred_fields())
+
+    def test_comment_counts(self):
+        post = Post.objects.filter(author=self.authors[0]).get()
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        counts = {
+            post.pk: post.comment_count
+            for post in FeedQuery().with_comment_counts().build()
+        }
+        self.assertEqual(counts[post.pk], 1)
+
+    def test_filters(self):
+        self.assertEqual(
+            FeedQuery().by_author(self.authors[0]).build().count(), 1
+        )
+        self.assertEqual(FeedQuery().by_group(self.group).build().count(), 3)
+        self.assertEqual(
+            FeedQuery().followed_by(self.reader).build().count(), 3
+        )
+
+    def test_feed_pages_make_constant_number_of_queries(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:follow_index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.authors[0].username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                queries = self.count_queries(url)
+                for author in self.authors:
+                    Post.objects.create(author=author, group=self.group,
+                                        text='Ещё пост')
+                cache.clear()
+                self.assertEqual(self.count_queries(url), queries)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return len(context.captured_queries)
+
+    def test_new_posts_returns_only_the_delta(self):
+        since = Post.objects.latest('id').id
+        post = Post.objects.create(author=self.authors[1], text='Свежий')
+        Post.objects.create(author=User.objects.create_user('stranger'),
+                            text='Чужой')
+        response = self.client.get(
+            reverse('posts:new_posts'), {'feed': 'follow', 'since': since}
+        )
+        self.assertEqual(list(response.context['posts']), [post])
+        response = self.client.get(
+            reverse('posts:new_posts'), {'feed': 'index', 'since': since}
+        )
+        self.assertEqual(len(response.context['posts']), 2)
+
+    def test_large_delta_is_paged_oldest_first(self):
+        since = Post.objects.latest('id').id
+        Post.objects.bulk_create(
+            Post(author=self.authors[0], text=f'Новый {i}')
+            for i in range(NUMBER + 3)
+        )
+        ids = sorted(Post.objects.filter(
+            text__startswith='Новый'
+        ).values_list('id', flat=True))
+        url = reverse('posts:new_posts')
+        response = self.client.get(url, {'feed': 'index', 'since': since})
+        first = [post.id for post in response.context['posts']]
+        self.assertEqual(first, ids[NUMBER - 1::-1])
+        self.assertContains(response, 'data-more="1"')
+        response = self.client.get(url, {'feed': 'index', 'since': first[0]})
+        second = [post.id for post in response.context['posts']]
+        self.assertEqual(second, ids[:NUMBER - 1:-1])
+        self.assertNotContains(response, 'data-more')
+
+    def test_follow_delta_requires_login(self):
+        response = Client().get(reverse('posts:new_posts'), {'feed': 'follow'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_event_channels(self):
+        self.assertEqual(channels('index', None), ['feed'])
+        self.assertIsNone(channels('follow', None))
+        self.assertEqual(
+            sorted(channels('follow', self.reader.id)),
+            sorted(author_channel(author.id) for author in self.authors)
+        )
@@ -1,21 +1,27 @@
-import tempfile
-import shutil
+import time
+from unittest import mock
 
 from django.test import Client, TestCase, override_settings
-from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from posts.models import Group, Post
 from http import HTTPStatus
 from django.contrib.auth import get_user_model
-from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from sorl.thumbnail import get_thumbnail
 
-User = get_user_model()
+from core.models import Task
+from core.tasks import work
+from posts.tasks import discard_image
+from posts.tests.factories import (
+    TempMediaMixin, image_file, make_post, make_user
+)
+from posts.thumbnails import FEED_GEOMETRY, THUMBNAIL_OPTIONS, warm
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostFormTest(TestCase):
+class PostFormTest(TempMediaMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -29,30 +35,15 @@ class PostFormTest(TestCase):
             description='Тестовое описание',
         )
 
-    @classmethod
-    def tearDownClass(cls) -> None:
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+    def setUp(self):
+        cache.clear()
 
     def test_create_post_form(self):
         """
         Валидная форма создает пост
         """
         post_count = Post.objects.count()
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
-        uploaded = SimpleUploadedFile(
-            name='small.gif',
-            content=small_gif,
-            content_type='image/gif'
-        )
-
+        uploaded = image_file()
         form_data = {
             'text': 'Тестовый пост',
             'group': self.group.id,
@@ -94,7 +85,7 @@ class PostFormTest(TestCase):
         response = self.authorized_author.post(
             reverse(
                 'posts:post_edit',
-                kwargs={'post_id': '1'}
+                kwargs={'post_id': self.post.id}
             ),
             data=form_data,
             follow=True,
@@ -103,7 +94,7 @@ class PostFormTest(TestCase):
             response,
             reverse(
                 'posts:post_detail',
-                kwargs={'post_id': '1'}
+                kwargs={'post_id': self.post.id}
             ),
         )
         self.assertTrue(
@@ -112,3 +103,119 @@ class PostFormTest(TestCase):
                 group=self.group.id
             ).exists()
         )
+
+
+class ImageUploadTest(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='uploader')
+        cls.authorized_author = Client()
+        cls.authorized_author.force_login(cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def image_file(size, image_format='JPEG', name='big.jpg'):
+        return image_file(name, size=size, image_format=image_format)
+
+    def create_post(self, image):
+        return self.authorized_author.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+
+    @mock.patch('posts.images.IMAGE_MAX_SIDE', 40)
+    def test_oversized_image_is_downsized(self):
+        self.create_post(self.image_file((120, 60)))
+        post = Post.objects.get(author=self.author)
+        self.assertEqual(
+            (post.image.width, post.image.height), (40, 20)
+        )
+
+    @mock.patch('posts.images.IMAGE_MAX_PIXELS', 100)
+    def test_too_many_pixels_are_rejected(self):
+        response = self.create_post(self.image_file((20, 20)))
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertTrue(response.context['form'].errors['image'])
+
+    @mock.patch('posts.images.IMAGE_MAX_SIZE', 10)
+    def test_too_large_file_is_rejected(self):
+        self.create_post(self.image_file((20, 20)))
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=100)
+    def test_too_large_request_is_rejected_before_parsing(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.author)
+        response = client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой',
+                  'image': self.image_file((20, 20))},
+        )
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+
+
+class PostEditImageTest(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = make_user()
+        cls.authorized_author = Client()
+        cls.authorized_author.force_login(cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.post = make_post(
+            author=self.author, image=image_file('old.png', color=(0, 0, 1))
+        )
+        self.old_image = self.post.image.name
+        warm(self.post.image)
+        self.old_thumbnail = get_thumbnail(
+            self.post.image, FEED_GEOMETRY, **THUMBNAIL_OPTIONS
+        ).name
+
+    def replace_image(self):
+        self.authorized_author.post(
+            reverse('posts:post_edit', args=[self.post.id]),
+            {'text': self.post.text,
+             'image': image_file('new.png', color=(0, 0, 2))},
+        )
+        work()
+        self.post.refresh_from_db()
+
+    def test_replaced_image_and_thumbnails_are_deleted(self):
+        self.replace_image()
+        self.assertNotEqual(self.post.image.name, self.old_image)
+        self.assertFalse(default_storage.exists(self.old_image))
+        self.assertFalse(default_storage.exists(self.old_thumbnail))
+        self.assertTrue(default_storage.exists(self.post.image.name))
+
+    def test_image_shared_with_other_post_is_kept(self):
+        make_post(author=self.author, image=self.old_image)
+        self.replace_image()
+        self.assertTrue(default_storage.exists(self.old_image))
+
+    def test_image_uploaded_again_after_replacement_is_kept(self):
+        since = time.time() - 1
+        default_storage.save(
+            'posts/again.png', image_file('again.png', color=(0, 0, 1))
+        )
+        discard_image(self.old_image, since)
+        self.assertTrue(default_storage.exists(self.old_image))
+
+    def test_text_edit_does_not_touch_image(self):
+        self.authorized_author.post(
+            reverse('posts:post_edit', args=[self.post.id]),
+            {'text': 'Новый текст'},
+        )
+        self.assertFalse(
+            Task.objects.filter(name__startswith='posts.').exists()
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image.name, self.old_image)
+        self.assertEqual(self.post.excerpt, 'Новый текст')
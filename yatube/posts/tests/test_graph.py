@@ -0,0 +1,181 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from posts.graph import (
+    GRAPH_LOCAL_TIMEOUT, GRAPH_TIMEOUT, follow_graph, graph_timeout
+)
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol, cls.dave = (
+            User.objects.create_user(username=name)
+            for name in ('alice', 'bob', 'carol', 'dave')
+        )
+        Follow.objects.bulk_create([
+            Follow(user=cls.alice, author=cls.bob),
+            Follow(user=cls.bob, author=cls.alice),
+            Follow(user=cls.bob, author=cls.carol),
+            Follow(user=cls.bob, author=cls.dave),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_following_and_followers_are_sorted_arrays(self):
+        self.assertEqual(
+            list(follow_graph.following(self.bob.id)),
+            sorted([self.alice.id, self.carol.id, self.dave.id])
+        )
+        self.assertEqual(
+            list(follow_graph.followers(self.alice.id)), [self.bob.id]
+        )
+
+    def test_is_following_uses_cached_graph(self):
+        follow_graph.following(self.alice.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.alice.id, self.bob.id)
+            )
+            self.assertFalse(
+                follow_graph.is_following(self.alice.id, self.carol.id)
+            )
+        self.assertFalse(follow_graph.is_following(None, self.bob.id))
+
+    def test_mutual_and_followers_count(self):
+        self.assertEqual(follow_graph.mutual(self.alice.id), [self.bob.id])
+        self.assertEqual(follow_graph.followers_count(self.bob.id), 1)
+
+    def test_suggestions_are_friends_of_friends(self):
+        self.assertEqual(
+            sorted(follow_graph.suggestions(self.alice.id)),
+            sorted([self.carol.id, self.dave.id])
+        )
+
+    def test_follow_views_invalidate_graph(self):
+        follow_graph.following(self.carol.id)
+        follow_graph.followers(self.dave.id)
+        client = Client()
+        client.force_login(self.carol)
+        client.get(reverse('posts:profile_follow', args=[self.dave]))
+        self.assertTrue(follow_graph.is_following(self.carol.id, self.dave.id))
+        self.assertEqual(follow_graph.followers_count(self.dave.id), 2)
+        with self.assertNumQueries(0):
+            follow_graph.followers_count(self.dave.id)
+        client.get(reverse('posts:profile_unfollow', args=[self.dave]))
+        self.assertFalse(
+            follow_graph.is_following(self.carol.id, self.dave.id)
+        )
+        self.assertEqual(follow_graph.followers_count(self.dave.id), 1)
+
+    def test_read_racing_a_follow_does_not_cache_stale_graph(self):
+        query = follow_graph._query
+
+        def query_then_follow(direction, user_ids):
+            edges = list(query(direction, user_ids))
+            follow_graph.follow(self.carol.id, self.dave.id)
+            return edges
+
+        with mock.patch.object(follow_graph, '_query', query_then_follow):
+            stale = follow_graph.followers_count(self.dave.id)
+        self.assertEqual(stale, 1)
+        self.assertEqual(follow_graph.followers_count(self.dave.id), 2)
+
+    def test_graph_expires_quickly_without_shared_cache(self):
+        with override_settings(SHARED_CACHE=False):
+            self.assertEqual(graph_timeout(), GRAPH_LOCAL_TIMEOUT)
+        with override_settings(SHARED_CACHE=True):
+            self.assertEqual(graph_timeout(), GRAPH_TIMEOUT)
+
+    def test_bulk_follow_and_unfollow_are_single_statements(self):
+        with self.assertNumQueries(1):
+            follow_graph.follow(
+                self.carol.id, self.alice.id, self.dave.id, self.carol.id
+            )
+        self.assertEqual(
+            Follow.objects.filter(user=self.carol).count(), 2
+        )
+        with self.assertNumQueries(1):
+            follow_graph.follow(self.carol.id, self.alice.id)
+        with self.assertNumQueries(1):
+            deleted = follow_graph.unfollow(
+                self.carol.id, self.alice.id, self.dave.id
+            )
+        self.assertEqual(deleted, 2)
+
+    def test_unfollow_does_not_insert(self):
+        with self.assertNumQueries(1):
+            follow_graph.unfollow(self.carol.id, self.alice.id)
+        self.assertFalse(Follow.objects.filter(user=self.carol).exists())
+
+
+class ConcurrentFollowTest(TransactionTestCase):
+    THREADS: int = 8
+    ATTEMPTS: int = 50
+
+    def follow_retrying(self, user_id, author_id):
+        """Тестовая БД SQLite в памяти не ждёт блокировок, а падает."""
+        for _ in range(self.ATTEMPTS - 1):
+            try:
+                return follow_graph.follow(user_id, author_id)
+            except OperationalError:
+                time.sleep(0.01)
+        return follow_graph.follow(user_id, author_id)
+
+    def run_threads(self, target, *args_list):
+        barrier = threading.Barrier(len(args_list))
+        errors = []
+
+        def run(*args):
+            barrier.wait()
+            try:
+                target(*args)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=args)
+                   for args in args_list]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_followers_are_all_counted(self):
+        cache.clear()
+        author = User.objects.create_user(username='star')
+        readers = [User.objects.create_user(username=f'fan{number}')
+                   for number in range(self.THREADS)]
+        self.assertEqual(follow_graph.followers_count(author.id), 0)
+        self.run_threads(
+            self.follow_retrying,
+            *[(reader.id, author.id) for reader in readers]
+        )
+        self.assertEqual(
+            follow_graph.followers_count(author.id), self.THREADS
+        )
+
+    def test_parallel_follow_creates_single_row(self):
+        user = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='writer')
+        self.run_threads(
+            self.follow_retrying, *[(user.id, author.id)] * self.THREADS
+        )
+        self.assertEqual(
+            Follow.objects.filter(user=user, author=author).count(), 1
+        )
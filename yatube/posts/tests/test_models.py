@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import EXCERPT_LENGTH, Group, Post
 
 User = get_user_model()
 CON: int = 15
@@ -30,3 +30,18 @@ class PostModelTest(TestCase):
         group = PostModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+    def test_excerpt_is_computed_on_save(self):
+        """Отрывок поста пересчитывается при сохранении."""
+        post = Post.objects.create(author=self.user, text='слово ' * 1000)
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(post.excerpt.endswith('…'))
+        post.text = 'Короткий текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Короткий текст')
+
+    def test_excerpt_is_computed_on_bulk_create(self):
+        """Отрывок заполняется и при bulk_create."""
+        Post.objects.bulk_create([Post(author=self.user, text='Пакетный')])
+        self.assertTrue(Post.objects.filter(excerpt='Пакетный').exists())
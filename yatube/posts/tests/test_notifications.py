@@ -0,0 +1,73 @@
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import work
+from posts.models import Follow, Notification, Post
+from posts.notifications import fan_out, send_digests, unread_count
+from posts.tests.factories import make_post, make_user
+
+
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = make_user()
+        cls.readers = [
+            make_user(email=f'reader{i}@example.com') for i in range(5)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=cls.author) for reader in cls.readers
+        )
+        cls.post = make_post(author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fan_out_goes_in_chunks(self):
+        last_id = fan_out(self.post, chunk=2)
+        self.assertEqual(last_id, self.readers[1].id)
+        self.assertEqual(Notification.objects.count(), 2)
+        last_id = fan_out(self.post, last_id, chunk=2)
+        last_id = fan_out(self.post, last_id, chunk=2)
+        self.assertIsNone(last_id)
+        self.assertEqual(Notification.objects.count(), 5)
+
+    def test_new_post_fans_out_through_task_queue(self):
+        client = self.client
+        client.force_login(self.author)
+        client.post(reverse('posts:post_create'), {'text': 'Ещё новость'})
+        self.assertTrue(Task.objects.filter(
+            name='posts.tasks.fan_out_post'
+        ).exists())
+        work()
+        self.assertEqual(Notification.objects.count(), len(self.readers))
+
+    def test_unread_count_in_header_and_reset_on_follow_index(self):
+        fan_out(self.post)
+        reader = self.readers[0]
+        self.assertEqual(unread_count(reader.id), 1)
+        self.client.force_login(reader)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_notifications'], 1)
+        self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(unread_count(reader.id), 0)
+        self.assertFalse(
+            Notification.objects.filter(user=reader, read=False).exists()
+        )
+
+    @override_settings(SITE_URL='https://yatube.example/')
+    def test_digest_is_one_email_per_reader(self):
+        fan_out(self.post)
+        second = Post.objects.create(author=self.author, text='Вторая')
+        fan_out(second)
+        Notification.objects.filter(user=self.readers[0]).update(read=True)
+        self.assertEqual(send_digests(batch=2), 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(mail.outbox[0].to, [self.readers[1].email])
+        self.assertIn('Вторая', mail.outbox[0].body)
+        self.assertIn(
+            f'\nhttps://yatube.example/posts/{second.id}/', mail.outbox[0].body
+        )
+        self.assertEqual(send_digests(), 0)
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post
+from posts.seed import Seeder
+from posts.tests.factories import TempMediaMixin
+
+SMALL = dict(users=60, groups=3, posts=300, comments=200, follows=6, images=2)
+
+
+class SeederTest(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.created = Seeder(seed=1, prefix='a', now=cls.now, **SMALL).run()
+
+    def snapshot(self, prefix):
+        follows = sorted(Follow.objects.filter(
+            user__username__startswith=prefix
+        ).values_list('user__username', 'author__username'))
+        posts = list(Post.objects.filter(
+            author__username__startswith=prefix
+        ).order_by('id').values_list('author__username', 'pub_date', 'text'))
+        strip = len(prefix)
+        return (
+            [(user[strip:], author[strip:]) for user, author in follows],
+            [(author[strip:], *rest) for author, *rest in posts],
+        )
+
+    def test_counts(self):
+        self.assertEqual(self.created['users'], SMALL['users'])
+        self.assertEqual(self.created['posts'], SMALL['posts'])
+        self.assertEqual(Comment.objects.count(), SMALL['comments'])
+        self.assertEqual(Follow.objects.count(), self.created['follows'])
+        self.assertEqual(
+            Post.objects.exclude(image='').values('image').distinct().count(),
+            SMALL['images']
+        )
+
+    def test_same_seed_gives_same_data(self):
+        Seeder(seed=1, prefix='b', now=self.now, **SMALL).run()
+        self.assertEqual(self.snapshot('a'), self.snapshot('b'))
+
+    def test_followers_follow_power_law(self):
+        followers = sorted(
+            Follow.objects.values('author').annotate(count=Count('id'))
+            .values_list('count', flat=True),
+            reverse=True
+        )
+        self.assertGreater(followers[0], 4 * followers[len(followers) // 2])
+
+    def test_dates_grow_with_ids_and_comments_follow_posts(self):
+        dates = list(
+            Post.objects.order_by('id').values_list('pub_date', flat=True)
+        )
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreaterEqual(dates[0], self.now - timedelta(days=90))
+        self.assertLessEqual(dates[-1], self.now)
+        self.assertFalse(
+            Comment.objects.filter(created__lt=F('post__pub_date')).exists()
+        )
+
+    def test_command_refuses_existing_prefix(self):
+        out = StringIO()
+        call_command('seed', '--prefix', 'c', '--users', '5', '--posts', '10',
+                     '--comments', '5', '--images', '0', stdout=out)
+        self.assertIn('posts: 10', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('seed', '--prefix', 'c', stdout=StringIO())
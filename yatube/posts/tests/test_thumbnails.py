@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import Post
+from posts.tests.factories import (
+    TempMediaMixin, image_file, make_post, make_user
+)
+from posts.thumbnails import (
+    FEED_GEOMETRY, GEOMETRIES, THUMBNAIL_OPTIONS, attach_thumbnails
+)
+
+
+class ThumbnailStoreTest(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = make_user()
+        cls.posts = [
+            make_post(
+                author=cls.user,
+                image=image_file(f'{i}.png', color=(i * 40, 0, 0)),
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.local.clear()
+
+    def test_warm_thumbnails_creates_every_geometry(self):
+        call_command('warm_thumbnails', '--count', '2', stdout=StringIO())
+        sources = [ImageFile(post.image) for post in self.posts]
+        thumbnails = [default.kvstore._get(source.key, identity='thumbnails')
+                      for source in sources]
+        self.assertIsNone(thumbnails[0])
+        self.assertEqual(len(thumbnails[1]), len(GEOMETRIES))
+        self.assertEqual(len(thumbnails[2]), len(GEOMETRIES))
+
+    def test_get_many_reads_missing_keys_in_one_query(self):
+        sources = [ImageFile(post.image) for post in self.posts]
+        for source in sources[:2]:
+            default.kvstore.set(source)
+        cache.clear()
+        default.kvstore.local.clear()
+        with self.assertNumQueries(1):
+            found = default.kvstore.get_many(sources)
+        self.assertEqual(set(found), {source.key for source in sources[:2]})
+        with self.assertNumQueries(0):
+            default.kvstore.get_many(sources)
+
+    def test_local_layer_answers_without_shared_cache(self):
+        source = ImageFile(self.posts[0].image)
+        default.kvstore.set(source)
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(default.kvstore.get(source).name, source.name)
+
+    def test_attach_thumbnails_resolves_page_in_one_query(self):
+        urls = [get_thumbnail(post.image, FEED_GEOMETRY,
+                              **THUMBNAIL_OPTIONS).url
+                for post in self.posts]
+        cache.clear()
+        default.kvstore.local.clear()
+        posts = list(Post.objects.order_by('pk'))
+        with self.assertNumQueries(1):
+            attach_thumbnails(posts)
+        self.assertEqual([post.thumbnail_url for post in posts], urls)
+
+    def test_attach_thumbnails_creates_missing(self):
+        posts = list(Post.objects.order_by('pk'))
+        posts.append(Post(author=self.user, text='Без картинки'))
+        attach_thumbnails(posts)
+        self.assertIsNone(posts[-1].thumbnail_url)
+        for post in posts[:-1]:
+            self.assertEqual(
+                post.thumbnail_url,
+                get_thumbnail(post.image, FEED_GEOMETRY,
+                              **THUMBNAIL_OPTIONS).url
+            )
@@ -13,10 +13,6 @@ class PostURLTests(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        cls.POST_URL = '/posts/1/'
-        cls.POSTS_EDIT = '/posts/1/edit/'
-        cls.POSTS_EDIT_UNAUTH = '/auth/login/?next=/posts/1/edit/'
-
         cls.user = User.objects.create_user(username='user1')
         cls.guest_client = Client()
         cls.authorized_client = Client()
@@ -31,12 +27,15 @@ class PostURLTests(TestCase):
             text='Тестовый текст',
             group_id=cls.group.id
         )
+        cls.POST_URL = f'/posts/{cls.post.id}/'
+        cls.POSTS_EDIT = f'/posts/{cls.post.id}/edit/'
+        cls.POSTS_EDIT_UNAUTH = f'/auth/login/?next={cls.POSTS_EDIT}'
         cls.templates_url_names = {
             '/': 'posts/index.html',
             '/group/test-slug/': 'posts/group_list.html',
             '/create/': 'posts/create_post.html',
-            '/posts/1/edit/': 'posts/create_post.html',
-            '/posts/1/': 'posts/post_detail.html',
+            cls.POSTS_EDIT: 'posts/create_post.html',
+            cls.POST_URL: 'posts/post_detail.html',
             '/profile/user1/': 'posts/profile.html',
         }
 
@@ -45,7 +44,7 @@ class PostURLTests(TestCase):
         не существующий выдаёт ошибку 404.
         """
         adresses = ('/create/',
-                    '/posts/1/edit/'
+                    self.POSTS_EDIT
                     )
         for adress in adresses:
             with self.subTest(adress=adress):
@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Post
+from posts.utils import FeedPaginator
+
+User = get_user_model()
+
+
+class FeedPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='paginator')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}') for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_exact_mode_counts_all_posts(self):
+        paginator = FeedPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 25)
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_small_feed_is_counted_exactly(self):
+        paginator = FeedPaginator(Post.objects.all(), 10, approximate=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 25)
+
+    @mock.patch('posts.utils.EXACT_COUNT_LIMIT', 5)
+    def test_large_feed_count_is_cached(self):
+        posts = Post.objects.all()
+        self.assertEqual(FeedPaginator(posts, 10, approximate=True).count, 25)
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(FeedPaginator(posts, 10, approximate=True).count, 25)
+
+    @mock.patch('posts.utils.MAX_PAGES', 2)
+    def test_deep_pages_are_capped(self):
+        paginator = FeedPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual(paginator.get_page(3).number, 2)
+
+    @mock.patch('posts.utils.PAGE_WINDOW', 1)
+    def test_page_window_surrounds_current_page(self):
+        paginator = FeedPaginator(Post.objects.all(), 5)
+        self.assertEqual(list(paginator.get_page(1).page_window), [1, 2])
+        self.assertEqual(list(paginator.get_page(3).page_window), [2, 3, 4])
+        self.assertEqual(list(paginator.get_page(5).page_window), [4, 5])
@@ -1,42 +1,30 @@
-import shutil
-import tempfile
-
 from datetime import datetime
+from io import StringIO
 
 from django.contrib.auth import get_user_model
-from django.core.files.uploadedfile import SimpleUploadedFile
-from django.conf import settings
-from django.test import Client, TestCase, override_settings
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
 from django.utils import timezone
 from django import forms
 from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from posts.forms import PostForm
 from posts.models import Post, Group, Comment, Follow
+from posts.tests.factories import TempMediaMixin, image_file
 
 User = get_user_model()
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
-
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostPagesTests(TestCase):
+class PostPagesTests(TempMediaMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x01\x00'
-            b'\x01\x00\x00\x00\x00\x21\xf9\x04'
-            b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
-            b'\x00\x00\x01\x00\x01\x00\x00\x02'
-            b'\x02\x4c\x01\x00\x3b'
-        )
-        uploaded = SimpleUploadedFile(
-            name='small.gif',
-            content=small_gif,
-            content_type='image/gif'
-        )
+        uploaded = image_file()
         cls.user = User.objects.create_user(username='test_usr')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -71,11 +59,6 @@ class PostPagesTests(TestCase):
         cls.guest_client = Client()
         cls.author.force_login(cls.user)
 
-    @classmethod
-    def tearDownClass(cls) -> None:
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def test_views_use_correct_template(self):
         for namespace, template in self.templates_pages_names.items():
             with self.subTest(template):
@@ -217,6 +200,8 @@ class PostPagesTests(TestCase):
         self.assertIn(post, other_group_response.context['page_obj'])
 
     def test_index_cache(self):
+        cache.clear()
+        self.authorized_client.get('/')
         Post.objects.create(
             text='new-post-with-cache',
             author=self.user,
@@ -274,8 +259,7 @@ class PaginatorViewsTest(TestCase):
         self.assertEqual(len(response.context["page_obj"]), 3, "Не три!")
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class CommentViewTest(TestCase):
+class CommentViewTest(TempMediaMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -298,11 +282,6 @@ class CommentViewTest(TestCase):
             text='Тестовый текст комментария',
         )
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def test_post_comment_is_shown_on_post_page(self):
         """После успешной отправки комментарий появляется на странице
         поста."""
@@ -437,3 +416,132 @@ class FollowViewTest(TestCase):
             self.post.text,
             response.context['page_obj'].object_list
         )
+
+
+class RecordingPurger:
+    purged = []
+
+    def __init__(self, **options):
+        pass
+
+    def purge(self, keys):
+        self.purged.append(keys)
+
+
+class EdgeCacheHeadersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='edge')
+        cls.group = Group.objects.create(
+            title='Группа', slug='edge', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Текст', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_feeds_are_public_and_tagged(self):
+        pages = {
+            reverse('posts:index'): 'feed',
+            reverse('posts:group_list', args=[self.group.slug]): (
+                f'group-{self.group.id}'
+            ),
+            reverse('posts:profile', args=[self.user.username]): (
+                f'author-{self.user.id}'
+            ),
+            reverse('posts:post_detail', args=[self.post.id]): (
+                f'post-{self.post.id}'
+            ),
+        }
+        for url, key in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                keys = response['Surrogate-Key'].split()
+                self.assertIn(key, keys)
+                self.assertIn(f'post-{self.post.id}', keys)
+
+    def test_authorized_responses_are_private(self):
+        self.client.force_login(self.user)
+        for url in (reverse('posts:index'), reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertNotIn('public', response['Cache-Control'])
+
+
+@override_settings(EDGE_CACHE_PURGER={
+    'BACKEND': 'posts.tests.test_views.RecordingPurger'
+})
+class PurgeOnWriteTest(TransactionTestCase):
+    def setUp(self):
+        RecordingPurger.purged.clear()
+        self.user = User.objects.create_user(username='writer')
+        self.author = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.user, text='Текст')
+        self.client.force_login(self.user)
+
+    def run_tasks(self):
+        call_command(
+            'run_tasks', '--once', '--processes', '1', stdout=StringIO()
+        )
+
+    def test_new_post_purges_feeds_and_author(self):
+        self.client.post(reverse('posts:post_create'), {'text': 'Новый'})
+        self.assertEqual(RecordingPurger.purged, [])
+        self.run_tasks()
+        post = Post.objects.get(text='Новый')
+        self.assertEqual(RecordingPurger.purged, [
+            sorted(['feed', f'post-{post.id}', f'author-{self.user.id}'])
+        ])
+
+    def test_comment_purges_post(self):
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.id]),
+            {'text': 'Комментарий'}
+        )
+        self.run_tasks()
+        self.assertEqual(RecordingPurger.purged, [[f'post-{self.post.id}']])
+
+    def edit(self, **data):
+        data.setdefault('text', self.post.text)
+        return self.client.post(
+            reverse('posts:post_edit', args=[self.post.id]), data
+        )
+
+    def test_edit_purges_only_the_post(self):
+        self.edit(text='Исправленный текст')
+        self.run_tasks()
+        self.assertEqual(RecordingPurger.purged, [[f'post-{self.post.id}']])
+
+    def test_moving_post_to_group_purges_the_group(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        self.edit(group=group.id)
+        self.run_tasks()
+        self.assertEqual(RecordingPurger.purged, [
+            sorted([f'post-{self.post.id}', f'group-{group.id}'])
+        ])
+
+    def test_unchanged_edit_writes_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.edit()
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.id])
+        )
+        writes = [query['sql'] for query in queries
+                  if not query['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+
+    def test_follow_purges_author(self):
+        self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.run_tasks()
+        self.assertEqual(
+            RecordingPurger.purged, [[f'author-{self.author.id}']]
+        )
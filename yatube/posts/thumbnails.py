@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default, delete, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+FEED_GEOMETRY = '2000x400'
+DETAIL_GEOMETRY = '960x339'
+GEOMETRIES = (FEED_GEOMETRY, DETAIL_GEOMETRY)
+THUMBNAIL_OPTIONS = {
+    'crop': 'center',
+    'upscale': True,
+}
+LOCAL_CACHE_SIZE: int = 10000
+LOCAL_CACHE_TIMEOUT: int = 60 * 5
+
+logger = logging.getLogger(__name__)
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """KV store sorl-thumbnail с кешем в памяти процесса.
+
+    Порядок поиска: словарь процесса, общий кеш, таблица в БД.
+    `get_many` достаёт набор ключей за один запрос к каждому уровню.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _local_get(self, key):
+        with self.lock:
+            expires, value = self.local.get(key, (0, None))
+            if expires < time.monotonic():
+                self.local.pop(key, None)
+                return None
+            self.local.move_to_end(key)
+            return value
+
+    def _local_set(self, key, value):
+        with self.lock:
+            self.local[key] = (time.monotonic() + LOCAL_CACHE_TIMEOUT, value)
+            self.local.move_to_end(key)
+            while len(self.local) > LOCAL_CACHE_SIZE:
+                self.local.popitem(last=False)
+
+    def _get_raw(self, key):
+        value = self._local_get(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self._local_set(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._local_set(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        with self.lock:
+            for key in keys:
+                self.local.pop(key, None)
+
+    def get_many_raw(self, keys):
+        """Сырые значения для набора ключей, отсутствующие пропускаются."""
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._local_get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            cached = self.cache.get_many(missing)
+            missing = [key for key in missing if key not in cached]
+            for key, value in cached.items():
+                if value != cached_db_kvstore.EMPTY_VALUE:
+                    found[key] = value
+                    self._local_set(key, value)
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            self.cache.set_many(
+                {key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                 for key in missing},
+                thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            for key, value in stored.items():
+                found[key] = value
+                self._local_set(key, value)
+        return found
+
+    def get_many(self, image_files):
+        """Словарь ключ картинки -> ImageFile для найденных в хранилище."""
+        keys = {add_prefix(image_file.key): image_file.key
+                for image_file in image_files}
+        return {
+            keys[key]: deserialize_image_file(value)
+            for key, value in self.get_many_raw(list(keys)).items()
+        }
+
+
+def thumbnail_file(source, geometry, **options):
+    """ImageFile миниатюры с тем же именем, что даст `get_thumbnail`.
+
+    Повторяет подготовку опций бэкенда sorl-thumbnail, но не
+    обращается ни к хранилищу, ни к KV store.
+    """
+    backend = default.backend
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def attach_thumbnails(posts, geometry=FEED_GEOMETRY):
+    """Проставляет постам `thumbnail_url` одним запросом к KV store.
+
+    Миниатюры, которых ещё нет в хранилище, создаются через
+    `get_thumbnail`; если картинку прочитать не удалось, `thumbnail_url`
+    остаётся пустым, как у тега `{% thumbnail %}`.
+    """
+    pending = []
+    for post in posts:
+        post.thumbnail_url = None
+        if post.image:
+            thumbnail = thumbnail_file(
+                ImageFile(post.image), geometry, **THUMBNAIL_OPTIONS
+            )
+            pending.append((post, thumbnail))
+    found = default.kvstore.get_many(
+        [thumbnail for _, thumbnail in pending]
+    )
+    for post, thumbnail in pending:
+        cached = found.get(thumbnail.key)
+        if cached is None:
+            try:
+                cached = get_thumbnail(
+                    post.image, geometry, **THUMBNAIL_OPTIONS
+                )
+            except Exception:
+                logger.exception('Не удалось создать миниатюру %s',
+                                 post.image.name)
+                continue
+        post.thumbnail_url = cached.url
+    return posts
+
+
+def warm(image):
+    """Создаёт миниатюры картинки во всех размерах сайта."""
+    for geometry in GEOMETRIES:
+        get_thumbnail(image, geometry, **THUMBNAIL_OPTIONS)
+    return len(GEOMETRIES)
+
+
+def discard(name):
+    """Удаляет картинку, её миниатюры и их записи в KV store."""
+    delete(ImageFile(name, default_storage))
+
+
+def modified_after(name, timestamp):
+    """Изменялся ли файл хранилища позже `timestamp`."""
+    try:
+        modified = default_storage.get_modified_time(name)
+    except (NotImplementedError, OSError):
+        return False
+    return modified.timestamp() > timestamp
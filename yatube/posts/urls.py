@@ -1,5 +1,7 @@
 from django.urls import path
 
+from core.ratelimit import ALL_METHODS, ratelimit
+
 from . import views
 
 app_name = 'posts'
@@ -9,14 +11,19 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
-    path('create/', views.post_create, name='post_create'),
+    path(
+        'create/',
+        ratelimit('10/m')(views.post_create),
+        name='post_create'
+    ),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/',
-         views.add_comment, name='add_comment'),
+         ratelimit('20/m')(views.add_comment), name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('new/', views.new_posts, name='new_posts'),
     path(
         'profile/<str:username>/follow/',
-        views.profile_follow,
+        ratelimit('30/m', methods=ALL_METHODS)(views.profile_follow),
         name='profile_follow'
     ),
     path(
@@ -1,11 +1,66 @@
+from hashlib import md5
+
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 
 
 NUMBER: int = 10
+EXACT_COUNT_LIMIT: int = 1000
+COUNT_CACHE_TIMEOUT: int = 60 * 5
+MAX_PAGES: int = 100
+PAGE_WINDOW: int = 3
+
+
+class FeedPaginator(Paginator):
+    """Paginator ленты с ограничением глубины и приблизительным count.
+
+    В приблизительном режиме точный COUNT(*) выполняется только
+    для небольших выборок, большие берутся из кеша.
+    """
+
+    def __init__(self, object_list, per_page, approximate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.approximate = approximate
+
+    @cached_property
+    def count(self):
+        if not self.approximate:
+            return super().count
+        bounded = self.object_list.values('pk')[:EXACT_COUNT_LIMIT].count()
+        if bounded < EXACT_COUNT_LIMIT:
+            return bounded
+        query = str(self.object_list.query).encode()
+        key = f'feed-count:{md5(query).hexdigest()}'
+        return cache.get_or_set(
+            key, self.object_list.count, COUNT_CACHE_TIMEOUT
+        )
 
+    @cached_property
+    def num_pages(self):
+        return min(super().num_pages, MAX_PAGES)
 
-def page(request, posts):
-    paginator = Paginator(posts, NUMBER)
+    def page_window(self, number):
+        """Номера страниц вокруг текущей для навигации."""
+        first = max(1, number - PAGE_WINDOW)
+        last = min(self.num_pages, number + PAGE_WINDOW)
+        return range(first, last + 1)
+
+    def _get_page(self, *args, **kwargs):
+        page_obj = super()._get_page(*args, **kwargs)
+        page_obj.page_window = self.page_window(page_obj.number)
+        return page_obj
+
+
+def page(request, posts, approximate=False):
+    paginator = FeedPaginator(posts, NUMBER, approximate=approximate)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def fetched_page(request, posts, approximate=False):
+    """Страница с уже загруженными из БД постами."""
+    page_obj = page(request, posts, approximate)
+    len(page_obj)
+    return page_obj
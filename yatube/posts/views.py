@@ -1,61 +1,102 @@
+import time
+
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 
+from core.edgecache import add_surrogate_keys, cache_policy, purge
+from core.queries import batch
+
+from .feeds import FeedQuery
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
-from .utils import page
+from .graph import follow_graph
+from .live import FOLLOW, INDEX, publish_post
+from .models import Post, Group, User
+from .notifications import mark_read
+from .tasks import discard_image, fan_out_post, warm_post_thumbnails
+from .thumbnails import attach_thumbnails
+from .utils import NUMBER, fetched_page, page
+
+FEED_KEY = 'feed'
+FEED_MAX_AGE: int = 60
+FEED_SHARED_MAX_AGE: int = 60 * 10
+
 
+def tag_posts(request, posts, *keys):
+    """Ключи CDN ответа: переданные и ключи всех постов страницы."""
+    add_surrogate_keys(request, *keys)
+    for post in posts:
+        add_surrogate_keys(request, *post.surrogate_keys)
 
+
+@cache_policy(FEED_MAX_AGE, FEED_SHARED_MAX_AGE)
 def index(request):
-    posts = Post.objects.select_related('group')
+    posts = FeedQuery().build()
+    page_obj = page(request, posts, approximate=True)
+    attach_thumbnails(page_obj)
+    tag_posts(request, page_obj, FEED_KEY)
     context = {
-        'page_obj': page(request, posts)
+        'page_obj': page_obj
     }
     return render(request, 'posts/index.html', context)
 
 
+@cache_policy(FEED_MAX_AGE, FEED_SHARED_MAX_AGE)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.select_related('group')
+    posts = FeedQuery().build()
+    page_obj = page(request, posts, approximate=True)
+    attach_thumbnails(page_obj)
+    tag_posts(request, page_obj, FEED_KEY, f'group-{group.id}')
     context = {
         'group': group,
-        'page_obj': page(request, posts)
+        'page_obj': page_obj
     }
     return render(request, template, context)
 
 
+@cache_policy(FEED_MAX_AGE, FEED_SHARED_MAX_AGE)
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(User, username=username)
-    post_author = Post.objects.filter(author=author)
-    if request.user.is_authenticated:
-        follow = Follow.objects.filter(
-            user=request.user.id,
-            author=author.id
-        ).exists()
-    else:
-        follow = False
+    post_author = FeedQuery().by_author(author).build()
+    user_id = request.user.id
+    page_obj, follow, followers_count = batch(
+        lambda: fetched_page(request, post_author),
+        lambda: follow_graph.is_following(user_id, author.id),
+        lambda: follow_graph.followers_count(author.id),
+    )
+    attach_thumbnails(page_obj)
+    tag_posts(request, page_obj, f'author-{author.id}')
     context = {
         'author': author,
-        'page_obj': page(request, post_author),
+        'page_obj': page_obj,
         'follow': follow,
-
+        'followers_count': followers_count,
+        'posts_count': page_obj.paginator.count,
     }
     return render(request, template, context)
 
 
+@cache_policy(FEED_MAX_AGE, FEED_SHARED_MAX_AGE)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    author = get_object_or_404(User, username=post.author)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments, posts_count = batch(
+        lambda: list(post.comments.select_related('author')),
+        lambda: post.author.posts.count(),
+    )
+    add_surrogate_keys(request, *post.surrogate_keys)
     context = {
         'post': post,
-        'author': author,
+        'author': post.author,
         'form': form,
         'comments': comments,
+        'posts_count': posts_count,
     }
     return render(request, 'posts/post_detail.html', context)
 
@@ -71,32 +112,57 @@ def post_create(request):
         instance_form = form.save(commit=False)
         instance_form.author = request.user
         instance_form.save()
+        purge(FEED_KEY, *instance_form.surrogate_keys)
+        if instance_form.image:
+            warm_post_thumbnails.delay(instance_form.id)
+        fan_out_post.delay(instance_form.id)
+        publish_post(instance_form)
         username = request.user.username
         return redirect(reverse('posts:profile', args=[username]))
     return render(request, template, context)
 
 
+def edit_keys(post, changed):
+    """Ключи CDN страниц, которые меняет правка поста.
+
+    Все страницы с постом помечены его ключом, поэтому лента автора
+    и прочие его посты не сбрасываются. Ключ группы нужен, только
+    если пост в неё перенесли.
+    """
+    keys = [f'post-{post.id}']
+    if 'group' in changed and post.group_id:
+        keys.append(f'group-{post.group_id}')
+    return keys
+
+
 @login_required
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
     post = get_object_or_404(Post, pk=post_id)
-    if post.author == request.user:
-        form = PostForm(request.POST or {'text': post.text,
-                        'group': post.group}, files=request.FILES or None,
-                        instance=post
-                        )
-        if request.method == 'POST' and form.is_valid():
-            post.text = form.cleaned_data['text']
-            post.group = form.cleaned_data['group']
-            form = PostForm(request.POST, instance=post)
-            post.save()
-            return redirect('posts:post_detail', post_id)
-        context = {'form': form,
-                   'post_id': post_id,
-                   'is_edit': True,
-                   }
-        return render(request, template, context)
-    return redirect('posts:post_detail', post_id)
+    if post.author_id != request.user.id:
+        return redirect('posts:post_detail', post_id)
+    old_image = post.image.name
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
+    if request.method == 'POST' and form.is_valid():
+        changed = form.changed_data
+        if changed:
+            post.save(update_fields=changed)
+            image_replaced = post.image.name != old_image
+            if not image_replaced and 'image' in changed:
+                changed.remove('image')
+            if changed:
+                purge(*edit_keys(post, changed))
+            if image_replaced and old_image:
+                discard_image.delay(old_image, time.time())
+            if image_replaced and post.image:
+                warm_post_thumbnails.delay(post.id)
+        return redirect('posts:post_detail', post_id)
+    context = {'form': form,
+               'post_id': post_id,
+               'is_edit': True,
+               }
+    return render(request, template, context)
 
 
 @login_required
@@ -108,33 +174,58 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        purge(f'post-{post.id}')
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@cache_policy(private=True)
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = FeedQuery().followed_by(request.user).build()
+    suggestions = follow_graph.suggestions(request.user.id)
+    page_obj = page(request, post_list)
+    attach_thumbnails(page_obj)
+    mark_read(request.user.id)
     context = {
-        'page_obj': page(request, post_list)
+        'page_obj': page_obj,
+        'suggestions': User.objects.filter(id__in=suggestions),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@cache_policy(private=True)
+def new_posts(request):
+    """Посты ленты новее `since`: то, о чём сообщил поток событий.
+
+    Отдаёт не больше `NUMBER` самых старых из новых постов; если новых
+    больше, фрагмент помечен `data-more`, и клиент запрашивает
+    следующую страницу от последнего полученного id.
+    """
+    feed = request.GET.get('feed', INDEX)
+    since = request.GET.get('since', '')
+    query = FeedQuery().newer_than(int(since) if since.isdigit() else 0)
+    if feed == FOLLOW:
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        query.followed_by(request.user)
+    posts = list(query.build().order_by('id')[:NUMBER + 1])
+    more = len(posts) > NUMBER
+    posts = attach_thumbnails(posts[:NUMBER][::-1])
+    return render(request, 'posts/includes/new_posts.html',
+                  {'posts': posts, 'more': more})
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    user = request.user
-    if author != user:
-        Follow.objects.get_or_create(
-            user=user, author=author
-        )
+    follow_graph.follow(request.user.id, author.id)
+    purge(f'author-{author.id}')
     return redirect('posts:profile', username=author.username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    user = get_object_or_404(User, username=username)
-    unfollow, _ = Follow.objects.get_or_create(
-        user=request.user, author=user)
-    unfollow.delete()
+    author = get_object_or_404(User, username=username)
+    follow_graph.unfollow(request.user.id, author.id)
+    purge(f'author-{author.id}')
     return redirect('posts:profile', username)
@@ -0,0 +1,34 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = 'Меряет число проверок пароля в секунду для каждого хешера.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50)
+        parser.add_argument('--threads', type=int, default=4)
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        for hasher in get_hashers():
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options['threads']) as pool:
+                results = list(pool.map(
+                    lambda _: hasher.verify(PASSWORD, encoded),
+                    range(logins)
+                ))
+            elapsed = time.perf_counter() - start
+            if not all(results):
+                raise CommandError(
+                    f'{hasher.algorithm}: пароль не прошёл проверку.'
+                )
+            self.stdout.write(
+                f'{hasher.algorithm}: {logins / elapsed:.1f} входов/с'
+            )
@@ -0,0 +1,62 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class LoginTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ])
+    def test_old_hash_is_upgraded_on_login(self):
+        user = User.objects.create(
+            username='old',
+            password=make_password('secret-pass', hasher='pbkdf2_sha256'),
+        )
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'old', 'password': 'secret-pass'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('md5$'))
+
+    def test_login_bursts_are_throttled(self):
+        url = reverse('users:login')
+        for _ in range(20):
+            self.client.post(url, {'username': 'x', 'password': 'y'})
+        response = self.client.post(url, {'username': 'x', 'password': 'y'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    @override_settings(RATELIMIT_IP_META='HTTP_X_FORWARDED_FOR',
+                       RATELIMIT_TRUSTED_PROXIES=1)
+    def test_spoofed_forwarded_for_is_still_throttled(self):
+        url = reverse('users:signup')
+        statuses = [
+            self.client.post(
+                url, {}, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7'
+            ).status_code
+            for i in range(6)
+        ]
+        self.assertEqual(statuses[:5], [HTTPStatus.OK] * 5)
+        self.assertEqual(statuses[5], HTTPStatus.TOO_MANY_REQUESTS)
+        response = self.client.post(
+            url, {}, HTTP_X_FORWARDED_FOR='10.0.0.1, 198.51.100.2'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_bench_login_reports_every_hasher(self):
+        out = StringIO()
+        call_command('bench_login', '--logins', '2', stdout=out)
+        self.assertIn('md5:', out.getvalue())
@@ -2,6 +2,8 @@
 from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import path
 
+from core.ratelimit import ip, ratelimit
+
 from . import views
 
 app_name = 'users'
@@ -10,9 +12,14 @@ urlpatterns = [path('logout/',
                LogoutView.as_view(template_name='users/logged_out.html'),
                name='logout'
                     ),
-               path('signup/', views.SignUp.as_view(), name='signup'),
+               path('signup/',
+                    ratelimit('5/h', key=ip)(views.SignUp.as_view()),
+                    name='signup'
+                    ),
                path('login/',
-                    LoginView.as_view(template_name='users/login.html'),
+                    ratelimit('20/m', key=ip)(
+                        LoginView.as_view(template_name='users/login.html')
+                    ),
                     name='login'
                     ),
                ]
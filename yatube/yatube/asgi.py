@@ -0,0 +1,17 @@
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+django_application = get_wsgi_application()
+
+from core.asgi import WsgiToAsgi  # noqa: E402
+from core.sse import EventStream, route  # noqa: E402
+from posts.live import channels  # noqa: E402
+
+application = route(
+    '/events/',
+    EventStream(channels, prefix='/events/'),
+    WsgiToAsgi(django_application),
+)
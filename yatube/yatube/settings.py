@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,15 +19,39 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = os.getenv(
+    'MEDIA_STORAGE', 'core.storage.ContentAddressedStorage'
+)
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_REQUEST_SIZE = 12 * 1024 * 1024
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')
+AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME', 'yatube')
+AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
+THUMBNAIL_KVSTORE = 'posts.thumbnails.KVStore'
+# Общий кеш для нескольких процессов: например,
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyLibMCCache
+# CACHE_LOCATION=127.0.0.1:11211 или django_redis.cache.RedisCache
+# с redis://... Без него у каждого процесса свой кеш в памяти.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
 
 DEBUG = True
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
 INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
@@ -42,7 +67,12 @@ INSTALLED_APPS = [
     'debug_toolbar',
 ]
 MIDDLEWARE = [
+    'core.middleware.RequestSizeLimitMiddleware',
+    'core.middleware.SamplingProfilerMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.EdgeCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,6 +81,37 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0))
+PROFILER_INTERVAL = 0.001
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+SLOW_QUERY_THRESHOLD = 0.1
+TASK_ALWAYS_EAGER = False
+TASK_WORKER_PROCESSES = int(os.getenv('TASK_WORKER_PROCESSES', 2))
+# Сессии кешируются только в общем кеше: в памяти процесса выход
+# из аккаунта не сбросил бы копии сессии в других воркерах.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE
+    else 'django.contrib.sessions.backends.db'
+)
+SESSION_CACHE_ALIAS = 'default'
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_CLEANUP_BATCH = 1000
+# Счётчики лимитов хранятся в кеше: без общего кеша лимиты
+# действуют на каждый процесс отдельно.
+RATELIMIT_ENABLE = True
+RATELIMIT_IP_META = os.getenv('RATELIMIT_IP_META')
+RATELIMIT_TRUSTED_PROXIES = int(os.getenv('RATELIMIT_TRUSTED_PROXIES', 1))
+EVENTS_BACKEND = {
+    'BACKEND': os.getenv('EVENTS_BACKEND', 'core.events.LocalBackend'),
+    'OPTIONS': {'url': os.getenv('EVENTS_REDIS_URL')}
+    if os.getenv('EVENTS_REDIS_URL') else {},
+}
+EDGE_CACHE_PURGER = {
+    'BACKEND': os.getenv('EDGE_CACHE_PURGER', 'core.edgecache.LogPurger'),
+    'OPTIONS': {'url': os.getenv('EDGE_CACHE_PURGE_URL')}
+    if os.getenv('EDGE_CACHE_PURGE_URL') else {},
+}
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -69,17 +130,29 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.notifications',
             ],
         },
     },
 ]
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 4))
+QUERY_BATCH_WORKERS = int(os.getenv('QUERY_BATCH_WORKERS', 4))
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+PASSWORD_HASHERS = [
+    hasher for hasher, module in (
+        ('django.contrib.auth.hashers.Argon2PasswordHasher', 'argon2'),
+        ('django.contrib.auth.hashers.BCryptSHA256PasswordHasher', 'bcrypt'),
+        ('django.contrib.auth.hashers.PBKDF2PasswordHasher', None),
+        ('django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher', None),
+    )
+    if module is None or find_spec(module) is not None
+]
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,3 +173,12 @@ USE_I18N = True
 USE_L10N = True
 USE_TZ = True
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+STATIC_SERVE = bool(os.getenv('STATIC_SERVE'))
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_CONTENT_TYPES = {
+    'text/html': ('br', 'gzip'),
+    'application/json': ('br', 'gzip'),
+    'text/plain': ('gzip', ),
+}
@@ -0,0 +1,23 @@
+"""Настройки для запуска тестов.
+
+Быстрый хешер паролей, тестовая БД в файле, чтобы её можно было
+сохранять между запусками, и свой MEDIA_ROOT на процесс pytest-xdist
+(процессы `manage.py test` раннер разводит сам).
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import BASE_DIR, DATABASES, os
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+TEST_RUNNER = 'core.testrunner.TimingTestRunner'
+
+DATABASES['default']['TEST'] = {
+    'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+}
+
+TEST_MEDIA_DIR = os.path.join(BASE_DIR, 'test_media')
+MEDIA_ROOT = os.path.join(
+    TEST_MEDIA_DIR, os.getenv('PYTEST_XDIST_WORKER', 'main')
+)
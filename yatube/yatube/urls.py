@@ -1,8 +1,10 @@
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import serve_static
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('admin/', admin.site.urls),
@@ -11,6 +13,11 @@ urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
 ]
 
+if settings.STATIC_SERVE:
+    urlpatterns += (
+        re_path(r'^static/(?P<path>.*)$', serve_static, name='static'),
+    )
+
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied'
 handler500 = 'core.views.server_error'